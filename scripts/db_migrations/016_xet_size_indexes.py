@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Migration 016: Index XetBlock.size and XetXorb.size.
+
+The admin Xet endpoints aggregate SUM(size) over both tables and bucket
+blocks by size range. Without an index each call is a full table scan.
+
+Changes:
+- Add index xetblock_size on XetBlock(size)
+- Add index xetxorb_size on XetXorb(size)
+"""
+
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+# Add db_migrations to path (for _migration_utils)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from kohakuhub.db import db
+from kohakuhub.config import cfg
+from _migration_utils import should_skip_due_to_future_migrations, check_table_exists
+
+MIGRATION_NUMBER = 16
+
+# (table, index name) - names match what init_db() creates for index=True
+SIZE_INDEXES = [
+    ("xetblock", "xetblock_size"),
+    ("xetxorb", "xetxorb_size"),
+]
+
+
+def is_applied(db, cfg):
+    """Check if THIS migration has been applied.
+
+    Returns True if both size indexes exist.
+    """
+    try:
+        for table_name, index_name in SIZE_INDEXES:
+            if not check_table_exists(db, table_name):
+                return False
+            names = {index.name for index in db.get_indexes(table_name)}
+            if index_name not in names:
+                return False
+        return True
+    except Exception:
+        # Error = treat as applied (safe fallback)
+        return True
+
+
+def migrate_postgres():
+    """Create size indexes in PostgreSQL."""
+    cursor = db.cursor()
+
+    print("Creating size indexes...")
+    for table_name, index_name in SIZE_INDEXES:
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name}(size)"
+        )
+        print(f"  ✓ Created {index_name}")
+
+
+def migrate_sqlite():
+    """Create size indexes in SQLite."""
+    cursor = db.cursor()
+
+    print("Creating size indexes...")
+    for table_name, index_name in SIZE_INDEXES:
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name}(size)"
+        )
+        print(f"  ✓ Created {index_name}")
+
+
+def run():
+    """Run migration 016.
+
+    Returns:
+        True if successful or already applied, False otherwise
+    """
+    db.connect(reuse_if_open=True)
+
+    try:
+        # Check if should skip due to future migrations
+        if should_skip_due_to_future_migrations(MIGRATION_NUMBER, db, cfg):
+            print(
+                f"Migration {MIGRATION_NUMBER}: Skipped (superseded by future migration)"
+            )
+            return True
+
+        # Xet tables are created by init_db() (with indexes) on first start
+        for table_name, _ in SIZE_INDEXES:
+            if not check_table_exists(db, table_name):
+                print(
+                    f"Migration {MIGRATION_NUMBER}: Skipped ({table_name} table doesn't exist yet)"
+                )
+                return True
+
+        # Check if already applied
+        if is_applied(db, cfg):
+            print(f"Migration {MIGRATION_NUMBER}: Already applied (size indexes exist)")
+            return True
+
+        print("=" * 70)
+        print(f"Migration {MIGRATION_NUMBER}: Index Xet block/xorb sizes")
+        print("=" * 70)
+
+        # Run migration in transaction
+        with db.atomic():
+            if cfg.app.db_backend == "postgres":
+                migrate_postgres()
+            else:
+                migrate_sqlite()
+
+        print("\n" + "=" * 70)
+        print(f"Migration {MIGRATION_NUMBER}: ✓ Completed Successfully")
+        print("=" * 70)
+        print("\nSummary:")
+        print("  • XetBlock.size and XetXorb.size are indexed")
+        print("  • Admin Xet stats/distribution no longer scan whole tables")
+        return True
+
+    except Exception as e:
+        print(f"\n✗ Migration {MIGRATION_NUMBER} failed: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Migration 017: Add DatasetStatsCache table for persisted split statistics.
+
+Split statistics stream up to 10k rows from upstream. For a fixed upstream
+commit the result never changes, so it is stored and reused.
+
+Changes:
+- Add DatasetStatsCache table keyed by (repo_id, revision, config, split, sample_size)
+"""
+
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+# Add db_migrations to path (for _migration_utils)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from kohakuhub.config import cfg
+from kohakuhub.db import db
+from _migration_utils import check_table_exists, should_skip_due_to_future_migrations
+
+MIGRATION_NUMBER = 17
+
+
+def is_applied(db, cfg):
+    """Check if THIS migration has been applied.
+
+    Returns True if DatasetStatsCache table exists.
+    """
+    return check_table_exists(db, "datasetstatscache")
+
+
+def _create_indexes(cursor):
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS datasetstatscache_repo_id
+        ON datasetstatscache(repo_id)
+        """
+    )
+    cursor.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS datasetstatscache_repo_id_revision_config_split_sample_size
+        ON datasetstatscache(repo_id, revision, config, split, sample_size)
+        """
+    )
+
+
+def migrate_postgres():
+    """Create DatasetStatsCache table in PostgreSQL."""
+    cursor = db.cursor()
+
+    print("Creating DatasetStatsCache table...")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS datasetstatscache (
+            id SERIAL PRIMARY KEY,
+            repo_id VARCHAR(255) NOT NULL,
+            revision VARCHAR(255) NOT NULL,
+            config VARCHAR(255) NOT NULL,
+            split VARCHAR(255) NOT NULL,
+            sample_size INTEGER NOT NULL,
+            stats_json TEXT NOT NULL,
+            computed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    print("  ✓ Created DatasetStatsCache table")
+
+    print("Creating indexes...")
+    _create_indexes(cursor)
+    print("  ✓ Created indexes")
+
+
+def migrate_sqlite():
+    """Create DatasetStatsCache table in SQLite."""
+    cursor = db.cursor()
+
+    print("Creating DatasetStatsCache table...")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS datasetstatscache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            repo_id VARCHAR(255) NOT NULL,
+            revision VARCHAR(255) NOT NULL,
+            config VARCHAR(255) NOT NULL,
+            split VARCHAR(255) NOT NULL,
+            sample_size INTEGER NOT NULL,
+            stats_json TEXT NOT NULL,
+            computed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    print("  ✓ Created DatasetStatsCache table")
+
+    print("Creating indexes...")
+    _create_indexes(cursor)
+    print("  ✓ Created indexes")
+
+
+def run():
+    """Run migration 017.
+
+    Returns:
+        True if successful or already applied, False otherwise
+    """
+    db.connect(reuse_if_open=True)
+
+    try:
+        # Check if should skip due to future migrations
+        if should_skip_due_to_future_migrations(MIGRATION_NUMBER, db, cfg):
+            print(
+                f"Migration {MIGRATION_NUMBER}: Skipped (superseded by future migration)"
+            )
+            return True
+
+        # Check if already applied
+        if is_applied(db, cfg):
+            print(
+                f"Migration {MIGRATION_NUMBER}: Already applied (DatasetStatsCache table exists)"
+            )
+            return True
+
+        print("=" * 70)
+        print(f"Migration {MIGRATION_NUMBER}: Add DatasetStatsCache table")
+        print("=" * 70)
+
+        # Run migration in transaction
+        with db.atomic():
+            if cfg.app.db_backend == "postgres":
+                migrate_postgres()
+            else:
+                migrate_sqlite()
+
+        print("\n" + "=" * 70)
+        print(f"Migration {MIGRATION_NUMBER}: ✓ Completed Successfully")
+        print("=" * 70)
+        print("\nSummary:")
+        print("  • Added DatasetStatsCache table")
+        print("  • Split statistics are reused for unchanged upstream commits")
+        return True
+
+    except Exception as e:
+        print(f"\n✗ Migration {MIGRATION_NUMBER} failed: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    run()
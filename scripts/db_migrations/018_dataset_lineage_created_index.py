@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Migration 018: Index DatasetLineage(repository, created_at).
+
+The lineage endpoint lists one dataset's lineage newest first. The existing
+(repository, revision) index finds the rows but leaves them to be sorted.
+
+Changes:
+- Add index datasetlineage_repository_id_created_at on DatasetLineage(repository_id, created_at)
+"""
+
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+# Add db_migrations to path (for _migration_utils)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from kohakuhub.db import db
+from kohakuhub.config import cfg
+from _migration_utils import should_skip_due_to_future_migrations, check_table_exists
+
+MIGRATION_NUMBER = 18
+
+TABLE_NAME = "datasetlineage"
+# Name matches what init_db() creates from DatasetLineage.Meta.indexes
+INDEX_NAME = "datasetlineage_repository_id_created_at"
+
+
+def is_applied(db, cfg):
+    """Check if THIS migration has been applied.
+
+    Returns True if the lineage (repository, created_at) index exists.
+    """
+    try:
+        if not check_table_exists(db, TABLE_NAME):
+            return False
+        return INDEX_NAME in {index.name for index in db.get_indexes(TABLE_NAME)}
+    except Exception:
+        # Error = treat as applied (safe fallback)
+        return True
+
+
+def migrate_postgres():
+    """Create lineage index in PostgreSQL."""
+    cursor = db.cursor()
+
+    print("Creating lineage index...")
+    cursor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON {TABLE_NAME}(repository_id, created_at)"
+    )
+    print(f"  ✓ Created {INDEX_NAME}")
+
+
+def migrate_sqlite():
+    """Create lineage index in SQLite."""
+    cursor = db.cursor()
+
+    print("Creating lineage index...")
+    cursor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON {TABLE_NAME}(repository_id, created_at)"
+    )
+    print(f"  ✓ Created {INDEX_NAME}")
+
+
+def run():
+    """Run migration 018.
+
+    Returns:
+        True if successful or already applied, False otherwise
+    """
+    db.connect(reuse_if_open=True)
+
+    try:
+        # Check if should skip due to future migrations
+        if should_skip_due_to_future_migrations(MIGRATION_NUMBER, db, cfg):
+            print(
+                f"Migration {MIGRATION_NUMBER}: Skipped (superseded by future migration)"
+            )
+            return True
+
+        # DatasetLineage is created by init_db() (with indexes) on first start
+        if not check_table_exists(db, TABLE_NAME):
+            print(
+                f"Migration {MIGRATION_NUMBER}: Skipped ({TABLE_NAME} table doesn't exist yet)"
+            )
+            return True
+
+        # Check if already applied
+        if is_applied(db, cfg):
+            print(f"Migration {MIGRATION_NUMBER}: Already applied (lineage index exists)")
+            return True
+
+        print("=" * 70)
+        print(f"Migration {MIGRATION_NUMBER}: Index dataset lineage by creation time")
+        print("=" * 70)
+
+        # Run migration in transaction
+        with db.atomic():
+            if cfg.app.db_backend == "postgres":
+                migrate_postgres()
+            else:
+                migrate_sqlite()
+
+        print("\n" + "=" * 70)
+        print(f"Migration {MIGRATION_NUMBER}: ✓ Completed Successfully")
+        print("=" * 70)
+        print("\nSummary:")
+        print("  • DatasetLineage is indexed on (repository, created_at)")
+        print("  • Lineage listings are read in index order instead of sorted")
+        return True
+
+    except Exception as e:
+        print(f"\n✗ Migration {MIGRATION_NUMBER} failed: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run()
+    sys.exit(0 if success else 1)
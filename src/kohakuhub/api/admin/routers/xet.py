@@ -1,31 +1,46 @@
 """Xet administration and metrics endpoints for admin API."""
 
-from fastapi import APIRouter, Depends
-from peewee import fn
+import asyncio
+import json
+import threading
 
-from kohakuhub.db import XetBlock, XetXorb, XetShard, XetFileLayout, File, Repository
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from peewee import Case, fn
+
+from kohakuhub.db import XetBlock, XetXorb, XetShard, XetFileLayout, File, Repository, db
 from kohakuhub.logger import get_logger
 from kohakuhub.api.admin.utils import verify_admin_token
+from kohakuhub.api.xet.metrics import metrics
 
 logger = get_logger("ADMIN_XET")
 router = APIRouter()
 
+# Simple buckets: <1MB, 1-4MB, 4-8MB, 8MB+
+BLOCK_SIZE_RANGES = [
+    ("under_1mb", (0, 1024 * 1024)),
+    ("1mb_4mb", (1024 * 1024, 4 * 1024 * 1024)),
+    ("4mb_8mb", (4 * 1024 * 1024, 8 * 1024 * 1024)),
+    ("over_8mb", (8 * 1024 * 1024, 1024 * 1024 * 1024 * 1024)),
+]
+
+
+def _compute_xet_stats() -> dict:
+    """Aggregate Xet storage statistics (blocking, run in a worker thread)."""
+
+    # One COUNT + SUM aggregate per table (shared scan, single round trip)
+    total_blocks, total_logical_size = XetBlock.select(
+        fn.COUNT(XetBlock.id), fn.COALESCE(fn.SUM(XetBlock.size), 0)
+    ).scalar(as_tuple=True)
+
+    total_xorbs, total_physical_size = XetXorb.select(
+        fn.COUNT(XetXorb.id), fn.COALESCE(fn.SUM(XetXorb.size), 0)
+    ).scalar(as_tuple=True)
+
+    total_shards, shard_size = XetShard.select(
+        fn.COUNT(XetShard.id), fn.COALESCE(fn.SUM(XetShard.size), 0)
+    ).scalar(as_tuple=True)
 
-@router.get("/stats")
-async def get_xet_stats(
-    _admin: bool = Depends(verify_admin_token),
-):
-    """Get high-level Xet storage statistics."""
-    
-    total_blocks = XetBlock.select().count()
-    total_logical_size = XetBlock.select(fn.SUM(XetBlock.size)).scalar() or 0
-    
-    total_xorbs = XetXorb.select().count()
-    total_physical_size = XetXorb.select(fn.SUM(XetXorb.size)).scalar() or 0
-    
-    total_shards = XetShard.select().count()
-    shard_size = XetShard.select(fn.SUM(XetShard.size)).scalar() or 0
-    
     # Deduplication Ratio
     # If physical size is 0 but we have blocks, logical size might be greater than 0
     # ratio = logical / physical
@@ -35,7 +50,7 @@ async def get_xet_stats(
     elif total_logical_size > 0:
         # Blocks exist but haven't been compacted into xorbs yet
         dedupe_ratio = 1.0 # Or potentially higher if we count duplicates in S3, but logically 1:1 for now
-        
+
     return {
         "blocks": {
             "count": total_blocks,
@@ -56,34 +71,161 @@ async def get_xet_stats(
     }
 
 
+# Rows handed from the query thread to the response per batch
+TOP_REPOS_BATCH_SIZE = 500
+# Largest ranking a single request may ask for
+TOP_REPOS_MAX_LIMIT = 10000
+# Batches buffered ahead of the client
+_TOP_REPOS_PREFETCH = 2
+_END = object()
+
+
+def _produce_top_xet_repos(
+    limit: int,
+    loop: asyncio.AbstractEventLoop,
+    out: asyncio.Queue,
+    slots: threading.Semaphore,
+    stopped: threading.Event,
+) -> None:
+    """Run the top-repos ranking once and feed JSON fragments to `out` (blocking).
+
+    Runs on its own thread for the whole response, so the cursor and its
+    connection stay on one thread while the client reads. A batch is only
+    sent once `slots` allows it; `stopped` is set when the client goes away.
+    """
+
+    def send(item) -> bool:
+        while not slots.acquire(timeout=0.5):
+            if stopped.is_set():
+                return False
+        loop.call_soon_threadsafe(out.put_nowait, item)
+        return True
+
+    try:
+        with db.connection_context():
+            # Count unique blocks per repository; Repository columns are selected in the
+            # join so rows don't lazily fetch their repository one by one
+            top_repos = (
+                File.select(
+                    Repository.full_id,
+                    Repository.repo_type,
+                    fn.COUNT(XetBlock.id).alias("block_count"),
+                    fn.SUM(XetBlock.size).alias("logical_size"),
+                )
+                .join(Repository, on=(File.repository == Repository.id))
+                .switch(File)
+                .join(XetFileLayout, on=(File.id == XetFileLayout.file))
+                .join(XetBlock, on=(XetFileLayout.block == XetBlock.id))
+                .group_by(Repository.id, Repository.full_id, Repository.repo_type)
+                .order_by(fn.SUM(XetBlock.size).desc(), Repository.id)
+                .limit(limit)
+                .dicts()
+            )
+
+            # iterator() skips peewee's result cache; rows are encoded as they arrive
+            batch = []
+            for row in top_repos.iterator():
+                batch.append(
+                    json.dumps(
+                        {
+                            "repo_full_id": row["full_id"],
+                            "repo_type": row["repo_type"],
+                            "block_count": row["block_count"],
+                            "logical_size_bytes": row["logical_size"],
+                        }
+                    )
+                )
+                if len(batch) == TOP_REPOS_BATCH_SIZE:
+                    if not send(batch):
+                        return
+                    batch = []
+            if batch and not send(batch):
+                return
+        send(_END)
+    except Exception as e:
+        send(e)
+
+
+async def _stream_top_xet_repos(limit: int):
+    """Yield the top-repos JSON array as the query thread produces it."""
+    out: asyncio.Queue = asyncio.Queue()
+    slots = threading.Semaphore(_TOP_REPOS_PREFETCH)
+    stopped = threading.Event()
+    threading.Thread(
+        target=_produce_top_xet_repos,
+        args=(limit, asyncio.get_running_loop(), out, slots, stopped),
+        name="xet-top-repos",
+        daemon=True,
+    ).start()
+
+    try:
+        yield "["
+        first = True
+        while True:
+            item = await out.get()
+            slots.release()
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield ("" if first else ",") + ",".join(item)
+            first = False
+        yield "]"
+    finally:
+        stopped.set()
+
+
+def _compute_block_distribution() -> dict[str, int]:
+    """Bucket blocks by size (blocking)."""
+
+    # Count every bucket in a single scan using SUM(CASE WHEN ...)
+    buckets = [
+        fn.COALESCE(
+            fn.SUM(
+                Case(
+                    None,
+                    [(((XetBlock.size >= low) & (XetBlock.size < high)), 1)],
+                    0,
+                )
+            ),
+            0,
+        ).alias(name)
+        for name, (low, high) in BLOCK_SIZE_RANGES
+    ]
+    row = XetBlock.select(*buckets).dicts().get()
+
+    return {name: int(row[name]) for name, _ in BLOCK_SIZE_RANGES}
+
+
+@router.get("/stats")
+async def get_xet_stats(
+    _admin: bool = Depends(verify_admin_token),
+):
+    """Get high-level Xet storage statistics."""
+    return await asyncio.to_thread(_compute_xet_stats)
+
+
 @router.get("/metrics/top-repos")
 async def get_top_xet_repos(
-    limit: int = 10,
+    limit: int = Query(default=10, ge=1, le=TOP_REPOS_MAX_LIMIT),
     _admin: bool = Depends(verify_admin_token),
 ):
-    """Get repositories with highest Xet usage."""
-    
-    # Count unique blocks per repository
-    top_repos = (
-        File.select(File.repository, fn.COUNT(XetBlock.id).alias("block_count"), fn.SUM(XetBlock.size).alias("logical_size"))
-        .join(XetFileLayout, on=(File.id == XetFileLayout.file))
-        .join(XetBlock, on=(XetFileLayout.block == XetBlock.id))
-        .group_by(File.repository)
-        .order_by(fn.SUM(XetBlock.size).desc())
-        .limit(limit)
+    """Get repositories with highest Xet usage.
+
+    The JSON array is streamed in batches from a single query, so large
+    limits don't buffer the whole ranking in memory.
+    """
+    return StreamingResponse(
+        _stream_top_xet_repos(limit), media_type="application/json"
     )
-    
-    results = []
-    for item in top_repos:
-        repo = item.repository
-        results.append({
-            "repo_full_id": repo.full_id if repo else "unknown",
-            "repo_type": repo.repo_type if repo else "unknown",
-            "block_count": item.block_count,
-            "logical_size_bytes": item.logical_size,
-        })
-        
-    return results
+
+
+@router.get("/metrics/dedup")
+async def get_dedup_metrics(
+    _admin: bool = Depends(verify_admin_token),
+):
+    """Get this worker's block deduplication counters since startup."""
+    return metrics.snapshot()
 
 
 @router.get("/metrics/distribution")
@@ -91,18 +233,4 @@ async def get_block_distribution(
     _admin: bool = Depends(verify_admin_token),
 ):
     """Get block size distribution."""
-    
-    # Simple buckets: <1MB, 1-4MB, 4-8MB, 8MB+
-    ranges = [
-        ("under_1mb", (0, 1024 * 1024)),
-        ("1mb_4mb", (1024 * 1024, 4 * 1024 * 1024)),
-        ("4mb_8mb", (4 * 1024 * 1024, 8 * 1024 * 1024)),
-        ("over_8mb", (8 * 1024 * 1024, 1024 * 1024 * 1024 * 1024)),
-    ]
-    
-    distribution = {}
-    for name, (low, high) in ranges:
-        count = XetBlock.select().where((XetBlock.size >= low) & (XetBlock.size < high)).count()
-        distribution[name] = count
-        
-    return distribution
+    return await asyncio.to_thread(_compute_block_distribution)
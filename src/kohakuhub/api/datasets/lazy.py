@@ -0,0 +1,16 @@
+"""Deferred import of the heavyweight `datasets` library.
+
+`import datasets` pulls in pyarrow, fsspec, multiprocess, dill and friends.
+Workers that never serve dataset viewer endpoints should not pay for it, so
+modules in this package resolve it through lazy_datasets() at call time.
+"""
+
+from functools import cache
+
+
+@cache
+def lazy_datasets():
+    """Import `datasets` on first use and return the module."""
+    import datasets
+
+    return datasets
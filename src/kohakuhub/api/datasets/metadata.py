@@ -1,165 +1,509 @@
+import hashlib
+import io
+import math
 import os
+import queue
+import sys
 import threading
+import weakref
+import fsspec
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import re
 import json
-from typing import Any, Dict, List, Optional
-from functools import lru_cache
-from kohakuhub.db import Repository, DatasetLineage, DatasetSnapshot
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
 
-import datasets
-from datasets import load_dataset, get_dataset_config_names, DatasetInfo
-from datasets.features import Features, Value, ClassLabel, Sequence
+import requests
+from cachetools import TTLCache
+from huggingface_hub import DatasetCard
+
+from kohakuhub.db import Repository, DatasetLineage, DatasetSnapshot, DatasetStatsCache
+
+from PIL import Image as PILImage
 
 from kohakuhub.config import cfg
 from kohakuhub.logger import get_logger
+from .lazy import lazy_datasets
 from .models import DatasetMetadata, DatasetFeature, DatasetSplitInfo, DatasetStatistics, SplitStatisticsResponse, ColumnStatistics
 
+if TYPE_CHECKING:
+    from datasets import DatasetInfo, Features
+
 logger = get_logger("DatasetsMetadata")
 
-# Initialize HF_ENDPOINT globally to avoid race conditions in threads
-# This ensures that all dataset operations point to the local instance
 _BASE_URL = cfg.app.base_url or "http://localhost:48888"
-os.environ["HF_ENDPOINT"] = _BASE_URL.rstrip("/")
 
+# Bounded, expiring caches so upstream schema/description changes become visible.
+# Keys carry a digest of the token, never the token itself; routers always pass
+# the system token, so in practice there is one entry per dataset.
+_CONFIGS_CACHE: TTLCache = TTLCache(maxsize=512, ttl=600)
+_METADATA_CACHE: TTLCache = TTLCache(maxsize=512, ttl=600)  # key -> (upstream sha, metadata)
+# Failures are remembered briefly so a missing/broken dataset isn't re-fetched
+# upstream on every request
+_CONFIGS_ERRORS: TTLCache = TTLCache(maxsize=512, ttl=30)
+_METADATA_ERRORS: TTLCache = TTLCache(maxsize=512, ttl=30)
+# Resolved upstream commit SHAs (None when unresolvable), shared by the viewer
+# ETags, metadata validation and persisted stats so a request resolves once
+_REVISION_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=30)
+_UNRESOLVED = object()
+_CACHE_LOCK = threading.Lock()
+# One loader per cold key; waiters pick up its result from the cache
+_INFLIGHT_LOCKS: "weakref.WeakValueDictionary[tuple, threading.Lock]" = weakref.WeakValueDictionary()
+
+# Persistent DatasetInfo store, keyed by (repo_id, config, upstream commit sha).
+# Resolved on first use since it lives under the datasets library's cache dir.
+_INFO_CACHE_ROOT: Optional[Path] = None
+
+
+def configure_hf_endpoint() -> str:
+    """Point the datasets/huggingface_hub libraries at this hub.
+
+    Called once from app startup rather than at import time, so importing this
+    module has no global side effects. An HF_ENDPOINT already present in the
+    environment wins over cfg.app.base_url.
+
+    Returns:
+        The endpoint in effect
+    """
+    endpoint = os.environ.setdefault("HF_ENDPOINT", _BASE_URL.rstrip("/")).rstrip("/")
+
+    # Both libraries snapshot HF_ENDPOINT when they are first imported
+    hf_constants = sys.modules.get("huggingface_hub.constants")
+    if hf_constants is not None:
+        hf_constants.ENDPOINT = endpoint
+        hf_constants.HUGGINGFACE_CO_URL_TEMPLATE = endpoint + "/{repo_id}/resolve/{revision}/{filename}"
+    datasets_config = sys.modules.get("datasets.config")
+    if datasets_config is not None:
+        datasets_config.HF_ENDPOINT = endpoint
+        datasets_config.HUB_DATASETS_URL = endpoint + "/datasets/{repo_id}/resolve/{revision}/{path}"
+
+    return endpoint
+
+
+def _get_hf_endpoint() -> str:
+    """Endpoint the datasets library talks to."""
+    return os.environ.get("HF_ENDPOINT", _BASE_URL).rstrip("/")
+
+
+# Simple regex for common PII
+_PII_PATTERNS = {
+    "email": r"[\w\.-]+@[\w\.-]+\.\w+",
+    "phone": r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b",
+    "ssn": r"\b\d{3}-\d{2}-\d{4}\b",
+    "ipv4": r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b",
+    "chinese_id": r"\b\d{17}[\dXx]\b",
+    "credit_card": r"\b(?:\d[ -]*?){13,16}\b",
+}
+_PII_RES = {label: re.compile(pattern) for label, pattern in _PII_PATTERNS.items()}
+# All patterns fused into one alternation: a single scan tells clean text apart
+_PII_RE = re.compile("|".join(f"(?P<{label}>{pattern})" for label, pattern in _PII_PATTERNS.items()))
+
+# Sensitive words (example list)
+_SENSITIVE_WORDS = ["confidential", "password", "secret", "private_key", "internal_only"]
+_SENSITIVE_RE = re.compile("|".join(map(re.escape, _SENSITIVE_WORDS)), re.IGNORECASE)
 
-def _scan_for_pii_and_sensitive(text: str) -> Dict[str, Any]:
-    """Basic PII and sensitive content scanner."""
+
+def _scan_for_pii_and_sensitive(texts: Iterable[str]) -> Dict[str, Any]:
+    """Basic PII and sensitive content scanner.
+
+    Values are scanned one at a time (no joined copy); a label is no longer
+    searched for once found, and scanning stops when everything has matched.
+    """
     report = {"pii_found": False, "sensitive_found": False, "matches": []}
-    
-    # Simple regex for common PII
-    patterns = {
-        "email": r"[\w\.-]+@[\w\.-]+\.\w+",
-        "phone": r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b",
-        "ssn": r"\b\d{3}-\d{2}-\d{4}\b",
-        "ipv4": r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b",
-        "chinese_id": r"\b\d{17}[\dXx]\b",
-        "credit_card": r"\b(?:\d[ -]*?){13,16}\b",
-    }
-    
-    # Sensitive words (example list)
-    sensitive_words = ["confidential", "password", "secret", "private_key", "internal_only"]
-    
-    for label, pattern in patterns.items():
-        if re.search(pattern, text):
+    pii_left = set(_PII_PATTERNS)
+    words_left = set(_SENSITIVE_WORDS)
+
+    for text in texts:
+        if pii_left and _PII_RE.search(text):
+            # The fused scan only says something matched; finditer can hide
+            # overlapping matches, so the labels still missing are checked singly
+            pii_left -= {match.lastgroup for match in _PII_RE.finditer(text)}
+            pii_left = {label for label in pii_left if not _PII_RES[label].search(text)}
+        if words_left:
+            words_left -= {word.lower() for word in _SENSITIVE_RE.findall(text)}
+        if not pii_left and not words_left:
+            break
+
+    for label in _PII_PATTERNS:
+        if label not in pii_left:
             report["pii_found"] = True
             report["matches"].append(label)
-            
-    for word in sensitive_words:
-        if word.lower() in text.lower():
+    for word in _SENSITIVE_WORDS:
+        if word not in words_left:
             report["sensitive_found"] = True
             report["matches"].append(f"sensitive_word:{word}")
-            
+
     return report
 
+def _dispatch(table: Dict[type, Any], feature_type: type, default):
+    """Look up a handler by exact type, falling back to the MRO once per new type."""
+    handler = table.get(feature_type)
+    if handler is None:
+        handler = next(
+            (table[base] for base in feature_type.__mro__ if base in table), default
+        )
+        table[feature_type] = handler
+    return handler
+
+
+def _serialize_value_feature(feature) -> Dict[str, Any]:
+    return {
+        "type": "Value",
+        "dtype": str(feature.dtype),
+    }
+
+
+def _serialize_classlabel_feature(feature) -> Dict[str, Any]:
+    return {
+        "type": "ClassLabel",
+        "num_classes": feature.num_classes,
+        "names": feature.names if feature.names else [],
+    }
+
+
+def _serialize_sequence_feature(feature) -> Dict[str, Any]:
+    return {
+        "type": "Sequence",
+        "feature": _serialize_feature_type(feature.feature),
+    }
+
+
+def _serialize_struct_feature(feature) -> Dict[str, Any]:
+    # Features is a dict subclass, so both report as "Struct"
+    return {
+        "type": "Struct",
+        "fields": {k: _serialize_feature_type(v) for k, v in feature.items()},
+    }
+
+
+def _serialize_other_feature(feature) -> Dict[str, Any]:
+    # Fallback for unrecognized types (Image, Audio, etc.)
+    return {
+        "type": str(type(feature).__name__),
+        "value": str(feature),
+    }
+
+
+def _value_category(feature) -> str:
+    dtype = str(feature.dtype)
+    if 'int' in dtype or 'float' in dtype:
+        return 'numeric'
+    elif 'string' in dtype:
+        return 'text'
+    elif 'bool' in dtype:
+        return 'boolean'
+    return 'other'
+
+
+def _classlabel_category(feature) -> str:
+    return 'categorical'
+
+
+def _sequence_category(feature) -> str:
+    inner_type = type(feature.feature).__name__
+    if 'Image' in inner_type:
+        return 'image'
+    elif 'Audio' in inner_type:
+        return 'audio'
+    return 'sequence'
+
+
+def _other_category(feature) -> str:
+    type_name = type(feature).__name__
+    if 'Image' in type_name:
+        return 'image'
+    elif 'Audio' in type_name:
+        return 'audio'
+    return 'other'
+
+
+# (serializer, categorizer) per feature type, so one lookup serves both.
+# Filled on first use so building it doesn't force `import datasets`.
+_FEATURE_HANDLERS: Dict[type, tuple] = {}
+_DEFAULT_FEATURE_HANDLERS = (_serialize_other_feature, _other_category)
+
+
+def _init_feature_dispatch():
+    if _FEATURE_HANDLERS:
+        return
+    features = lazy_datasets().features
+    _FEATURE_HANDLERS.update({
+        features.Value: (_serialize_value_feature, _value_category),
+        features.ClassLabel: (_serialize_classlabel_feature, _classlabel_category),
+        features.Sequence: (_serialize_sequence_feature, _sequence_category),
+        features.Features: (_serialize_struct_feature, _other_category),
+        dict: (_serialize_struct_feature, _other_category),
+    })
+
+
+def _feature_handlers(feature) -> tuple:
+    _init_feature_dispatch()
+    return _dispatch(_FEATURE_HANDLERS, type(feature), _DEFAULT_FEATURE_HANDLERS)
+
+
 def _serialize_feature_type(feature) -> Dict[str, Any]:
     """Serialize a single feature type to a JSON-compatible dict."""
-    if isinstance(feature, Value):
-        return {
-            "type": "Value",
-            "dtype": str(feature.dtype),
-        }
-    elif isinstance(feature, ClassLabel):
-        return {
-            "type": "ClassLabel",
-            "num_classes": feature.num_classes,
-            "names": feature.names if feature.names else [],
-        }
-    elif isinstance(feature, Sequence):
-        return {
-            "type": "Sequence",
-            "feature": _serialize_feature_type(feature.feature),
-        }
-    elif isinstance(feature, (dict, Features)):
-        fields = {}
-        target_dict = feature if isinstance(feature, dict) else feature.items()
-        for k, v in (target_dict.items() if isinstance(target_dict, dict) else target_dict):
-            fields[k] = _serialize_feature_type(v)
-        return {
-            "type": "Struct" if isinstance(feature, dict) else "Features",
-            "fields": fields,
-        }
-    else:
-        # Fallback for unrecognized types (Image, Audio, etc.)
-        return {
-            "type": str(type(feature).__name__),
-            "value": str(feature),
-        }
-
-
-def _calculate_feature_type_distribution(features: Features) -> Dict[str, int]:
-    """Calculate distribution of feature types."""
+    serialize, _ = _feature_handlers(feature)
+    return serialize(feature)
+
+
+def _serialize_and_bucket(features: "Features") -> tuple[Dict[str, Dict[str, Any]], Dict[str, int]]:
+    """Serialize top-level features and count them per type category in one pass."""
+    serialized = {}
     distribution = {}
-    
-    def count_type(feature):
-        key = 'other'
-        if isinstance(feature, Value):
-            dtype = str(feature.dtype)
-            if 'int' in dtype or 'float' in dtype:
-                key = 'numeric'
-            elif 'string' in dtype:
-                key = 'text'
-            elif 'bool' in dtype:
-                key = 'boolean'
-        elif isinstance(feature, ClassLabel):
-            key = 'categorical'
-        elif isinstance(feature, Sequence):
-            inner_type = type(feature.feature).__name__
-            if 'Image' in inner_type:
-                key = 'image'
-            elif 'Audio' in inner_type:
-                key = 'audio'
-            else:
-                key = 'sequence'
-        elif 'Image' in type(feature).__name__:
-            key = 'image'
-        elif 'Audio' in type(feature).__name__:
-            key = 'audio'
-        
+
+    for name, feature in features.items():
+        serialize, categorize = _feature_handlers(feature)
+        serialized[name] = serialize(feature)
+        key = categorize(feature)
         distribution[key] = distribution.get(key, 0) + 1
-    
-    for feature in features.values():
-        count_type(feature)
-    
-    return distribution
-def validate_schema_consistency(sample: List[Dict[str, Any]], expected_features: Features) -> List[str]:
-    """Validate that sample rows match the expected schema and check for None values."""
-    warnings = []
-    if not sample:
+
+    return serialized, distribution
+
+
+def validate_schema_consistency(sample: pa.Table, expected_features: "Features") -> Dict[str, List[str]]:
+    """Validate that sample columns match the expected schema and check for None values.
+
+    Returns warnings grouped by column name; columns without issues are omitted.
+    """
+    warnings: Dict[str, List[str]] = {}
+    if sample.num_rows == 0:
         return warnings
 
+    value_type = lazy_datasets().Value
     for key, feature in expected_features.items():
-        null_count = sum(1 for row in sample if row.get(key) is None)
-        null_ratio = null_count / len(sample)
+        if key not in sample.column_names:
+            continue
+        column = sample.column(key)
+        column_warnings = []
+        null_ratio = column.null_count / sample.num_rows
         
         if null_ratio > 0.1:
-            warnings.append(f"Column '{key}' has high null ratio: {null_ratio:.1%}")
+            column_warnings.append(f"Column '{key}' has high null ratio: {null_ratio:.1%}")
             
         # Basic type checking
-        if isinstance(feature, Value):
-            for i, row in enumerate(sample[:10]): # Check first 10
-                val = row.get(key)
-                if val is not None:
-                    # Very basic check
-                    if 'int' in str(feature.dtype) and not isinstance(val, (int, np.integer)):
-                        warnings.append(f"Type mismatch in '{key}': expected {feature.dtype}, found {type(val).__name__} at row {i}")
-                        break
+        if isinstance(feature, value_type):
+            # Very basic check
+            if 'int' in str(feature.dtype) and not pa.types.is_integer(column.type):
+                column_warnings.append(f"Type mismatch in '{key}': expected {feature.dtype}, found {column.type}")
+
+        if column_warnings:
+            warnings[key] = column_warnings
     return warnings
 
 
-@lru_cache(maxsize=128)
-def get_dataset_configs(namespace: str, repo: str, token: Optional[str] = None) -> List[str]:
-    """Get available configuration names for a dataset."""
-    repo_id = f"{namespace}/{repo}"
+def _get_upstream_revision(repo_id: str, revision: str = "main", token: Optional[str] = None) -> Optional[str]:
+    """Resolve a dataset revision to its commit SHA.
+
+    One small API call, memoized for a few seconds so back-to-back viewer
+    requests (and cache hits) don't each wait on the upstream.
+    """
+    key = (repo_id, revision, _token_key(token))
+    with _CACHE_LOCK:
+        sha = _REVISION_CACHE.get(key, _UNRESOLVED)
+    if sha is _UNRESOLVED:
+        sha = _fetch_upstream_revision(repo_id, revision, token)
+        with _CACHE_LOCK:
+            _REVISION_CACHE[key] = sha
+    return sha
+
+
+def _fetch_upstream_revision(repo_id: str, revision: str, token: Optional[str]) -> Optional[str]:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
     try:
-        configs = get_dataset_config_names(repo_id, token=token, trust_remote_code=True)
-        return configs if configs else ["default"]
+        resp = requests.get(
+            f"{_get_hf_endpoint()}/api/datasets/{repo_id}/revision/{revision}",
+            headers=headers,
+            timeout=5,
+        )
+        resp.raise_for_status()
+        return resp.json().get("sha")
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def _load_card_dataset_infos(
+    repo_id: str, revision: str = "main", token: Optional[str] = None
+) -> Dict[str, "DatasetInfo"]:
+    """Per-config DatasetInfo declared in the dataset card's YAML header.
+
+    One README download, no builder. Returns {} unless every declared config
+    has both features and split sizes, so callers can fall back to a builder.
+    """
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    resp = requests.get(
+        f"{_get_hf_endpoint()}/datasets/{repo_id}/resolve/{revision}/README.md",
+        headers=headers,
+        timeout=10,
+    )
+    if resp.status_code == 404:
+        return {}
+    resp.raise_for_status()
+
+    card_data = DatasetCard(resp.text).data
+    infos = lazy_datasets().info.DatasetInfosDict.from_dataset_card_data(card_data)
+    if not infos or any(not info.features or not info.splits for info in infos.values()):
+        return {}
+
+    # Same order as get_dataset_config_names: as declared under `configs`
+    names = [c["config_name"] for c in card_data.get("configs") or [] if c.get("config_name")] or list(infos)
+    if not set(names) <= set(infos):
+        return {}
+    return {name: infos[name] for name in names}
+
+
+def get_viewer_revision(
+    namespace: str, repo: str, *parts: Any, ref: str = "main", token: Optional[str] = None
+) -> Tuple[str, Optional[str]]:
+    """Pin a viewer request to an upstream commit.
+
+    Returns the revision to serve the body from (the commit SHA `ref` resolves
+    to) and an ETag for that SHA plus the request parameters, so a body and its
+    ETag always describe the same commit. When the revision can't be resolved,
+    `ref` is served as-is and the ETag is None, so callers skip conditional
+    handling rather than validate against a guess.
+    """
+    sha = _get_upstream_revision(f"{namespace}/{repo}", ref, token)
+    if sha is None:
+        return ref, None
+    key = ":".join([sha, *(str(part) for part in parts)])
+    return sha, f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+
+def _info_cache_dir(repo_id: str, config: str, sha: str) -> Path:
+    """On-disk location of a cached DatasetInfo for an exact upstream commit."""
+    global _INFO_CACHE_ROOT
+    if _INFO_CACHE_ROOT is None:
+        _INFO_CACHE_ROOT = Path(lazy_datasets().config.HF_DATASETS_CACHE) / ".kohakuhub_meta"
+    digest = hashlib.sha256(f"{repo_id}\0{config}\0{sha}".encode()).hexdigest()
+    return _INFO_CACHE_ROOT / digest[:2] / digest
+
+
+def _load_dataset_info(repo_id: str, config: str, token: Optional[str] = None) -> "DatasetInfo":
+    """Load DatasetInfo, reusing the on-disk copy for an unchanged upstream commit.
+
+    Running the builder downloads and parses the dataset card (and sometimes
+    scripts); for a pinned (repo, config, sha) the result never changes, so it
+    is stored as dataset_info.json and read back on later calls. The builder
+    is loaded at that sha, so what's stored is always that commit's info.
+    """
+    datasets = lazy_datasets()
+    sha = _get_upstream_revision(repo_id, token=token)
+    cache_dir = _info_cache_dir(repo_id, config, sha) if sha else None
+
+    if cache_dir and (cache_dir / "dataset_info.json").exists():
+        try:
+            return datasets.DatasetInfo.from_directory(str(cache_dir))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cached info for {repo_id}: {e}")
+
+    # Load dataset builder (lightweight)
+    try:
+        builder = datasets.load_dataset_builder(
+            repo_id,
+            name=config if config != "default" else None,
+            token=token,
+            trust_remote_code=True,
+            revision=sha,
+        )
+        info = builder.info
     except Exception as e:
-        logger.warning(f"Could not get configs for {repo_id}: {e}")
-        return ["default"]
+        logger.warning(f"Builder failed for {repo_id}, config={config}: {e}")
+        # Fallback: load with streaming to get info
+        dataset = datasets.load_dataset(
+            repo_id,
+            name=config if config != "default" else None,
+            streaming=True,
+            token=token,
+            trust_remote_code=True,
+            revision=sha,
+        )
+        first_split = next(iter(dataset.keys())) if dataset else None
+        if first_split:
+            info = dataset[first_split].info
+        else:
+            raise ValueError(f"No splits found for {repo_id}")
+
+    if cache_dir:
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            info.write_to_directory(str(cache_dir))
+        except Exception as e:
+            logger.warning(f"Failed to cache dataset info for {repo_id}: {e}")
+
+    return info
+
+
+def _token_key(token: Optional[str]) -> Optional[str]:
+    """Short digest of a token for use in cache keys."""
+    return hashlib.sha256(token.encode()).hexdigest()[:16] if token else None
+
+
+@contextmanager
+def _single_flight(key: tuple):
+    """Serialize loads of one cache key so concurrent misses hit upstream once."""
+    with _CACHE_LOCK:
+        lock = _INFLIGHT_LOCKS.get(key)
+        if lock is None:
+            lock = threading.Lock()
+            _INFLIGHT_LOCKS[key] = lock
+    with lock:
+        yield
+
+
+def _cached_configs(key: tuple) -> Optional[List[str]]:
+    with _CACHE_LOCK:
+        cached = _CONFIGS_CACHE.get(key)
+        if cached is None:
+            cached = _CONFIGS_ERRORS.get(key)
+    return cached
+
+
+def get_dataset_configs(namespace: str, repo: str, token: Optional[str] = None) -> List[str]:
+    """Get available configuration names for a dataset."""
+    key = (namespace, repo, _token_key(token))
+    cached = _cached_configs(key)
+    if cached is not None:
+        return cached
+
+    with _single_flight(("configs",) + key):
+        cached = _cached_configs(key)
+        if cached is not None:
+            return cached
+
+        repo_id = f"{namespace}/{repo}"
+        try:
+            configs = lazy_datasets().get_dataset_config_names(repo_id, token=token, trust_remote_code=True)
+            configs = configs if configs else ["default"]
+            cache = _CONFIGS_CACHE
+        except Exception as e:
+            logger.warning(f"Could not get configs for {repo_id}: {e}")
+            configs = ["default"]
+            cache = _CONFIGS_ERRORS
+
+        with _CACHE_LOCK:
+            cache[key] = configs
+    return configs
+
+
+def _cached_metadata(key: tuple, etag: Optional[str]) -> Optional[DatasetMetadata]:
+    with _CACHE_LOCK:
+        cached = _METADATA_CACHE.get(key)
+        failed = _METADATA_ERRORS.get(key)
+    if cached is not None:
+        cached_etag, cached_metadata = cached
+        if etag is None or etag == cached_etag:
+            return cached_metadata
+    return failed
 
 
-@lru_cache(maxsize=128)
 def get_dataset_metadata(
     namespace: str, 
     repo: str, 
@@ -168,7 +512,41 @@ def get_dataset_metadata(
 ) -> DatasetMetadata:
     """
     Extract comprehensive metadata from a dataset using the datasets library.
+
+    Results are cached per (namespace, repo, config) together with the upstream
+    commit SHA; a cached entry is reused as long as the SHA is unchanged.
+    Concurrent misses for the same key share a single load, and failed loads
+    are cached for a short time.
     """
+    key = (namespace, repo, config, _token_key(token))
+    etag = _get_upstream_revision(f"{namespace}/{repo}", token=token)
+
+    cached = _cached_metadata(key, etag)
+    if cached is not None:
+        return cached
+
+    with _single_flight(("metadata",) + key):
+        cached = _cached_metadata(key, etag)
+        if cached is not None:
+            return cached
+
+        result = _load_dataset_metadata(namespace, repo, config, token)
+        with _CACHE_LOCK:
+            if result.error is None:
+                _METADATA_CACHE[key] = (etag, result)
+                _METADATA_ERRORS.pop(key, None)
+            else:
+                _METADATA_ERRORS[key] = result
+    return result
+
+
+def _load_dataset_metadata(
+    namespace: str,
+    repo: str,
+    config: Optional[str] = None,
+    token: Optional[str] = None
+) -> DatasetMetadata:
+    """Build DatasetMetadata from the dataset builder (uncached)."""
     repo_id = f"{namespace}/{repo}"
     configs = get_dataset_configs(namespace, repo, token)
     
@@ -178,30 +556,7 @@ def get_dataset_metadata(
     try:
         logger.info(f"Loading metadata for {repo_id} with config {current_config}")
         
-        # Load dataset builder (lightweight)
-        try:
-            builder = datasets.load_dataset_builder(
-                repo_id,
-                name=current_config if current_config != "default" else None,
-                token=token,
-                trust_remote_code=True
-            )
-            info = builder.info
-        except Exception as e:
-            logger.warning(f"Builder failed for {repo_id}, config={current_config}: {e}")
-            # Fallback: load with streaming to get info
-            dataset = load_dataset(
-                repo_id,
-                name=current_config if current_config != "default" else None,
-                streaming=True,
-                token=token,
-                trust_remote_code=True
-            )
-            first_split = next(iter(dataset.keys())) if dataset else None
-            if first_split:
-                info = dataset[first_split].info
-            else:
-                raise ValueError(f"No splits found for {repo_id}")
+        info = _load_dataset_info(repo_id, current_config, token)
         
         # Extract metadata
         splits_data = {}
@@ -229,10 +584,12 @@ def get_dataset_metadata(
         )
 
         features_data = {}
+        type_distribution = {}
         if info.features:
+            serialized_features, type_distribution = _serialize_and_bucket(info.features)
             features_data = {
-                name: DatasetFeature(**_serialize_feature_type(feature))
-                for name, feature in info.features.items()
+                name: DatasetFeature(**serialized)
+                for name, serialized in serialized_features.items()
             }
 
         # Get Lineage using the Repository model
@@ -274,7 +631,7 @@ def get_dataset_metadata(
             splits=splits_data,
             features=features_data,
             statistics=statistics,
-            type_distribution=_calculate_feature_type_distribution(info.features) if info.features else {},
+            type_distribution=type_distribution,
             description=getattr(info, 'description', None),
             homepage=getattr(info, 'homepage', None),
             license=getattr(info, 'license', None),
@@ -296,6 +653,355 @@ def get_dataset_metadata(
         )
 
 
+_STATS_POOL: Optional[ThreadPoolExecutor] = None
+_STATS_POOL_LOCK = threading.Lock()
+
+
+def _stats_pool() -> ThreadPoolExecutor:
+    """Process-wide pool for per-column statistics, created on first use."""
+    global _STATS_POOL
+    if _STATS_POOL is None:
+        with _STATS_POOL_LOCK:
+            if _STATS_POOL is None:
+                _STATS_POOL = ThreadPoolExecutor(
+                    max_workers=min(8, os.cpu_count() or 1),
+                    thread_name_prefix="column-stats",
+                )
+    return _STATS_POOL
+
+
+_PREFETCH_DEPTH = 4
+_PREFETCH_BATCH_ROWS = 128
+_PREFETCH_END = object()
+
+
+class _PrefetchError:
+    """Carries an exception raised by the prefetch thread to the consumer."""
+
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def _prefetch(iterable, depth: int = _PREFETCH_DEPTH):
+    """Iterate `iterable` from a background thread, keeping up to `depth` items ready.
+
+    Streaming datasets block on network I/O for every shard, so the next batch
+    is fetched while the caller is still handling the current one. Closing the
+    generator early stops the producer once its in-flight item is done.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_PrefetchError(e))
+            return
+        put(_PREFETCH_END)
+
+    threading.Thread(target=produce, name="stats-prefetch", daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _PREFETCH_END:
+                return
+            if isinstance(item, _PrefetchError):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+
+
+def _take_arrow_sample(dataset, sample_size: int) -> Optional[pa.Table]:
+    """Pull up to sample_size rows from a streaming dataset as one Arrow table."""
+    batches = []
+    total = 0
+    arrow_dataset = dataset.take(sample_size).with_format("arrow")
+    batch_size = min(sample_size, _PREFETCH_BATCH_ROWS)
+    for batch in _prefetch(arrow_dataset.iter(batch_size=batch_size)):
+        batches.append(batch)
+        total += batch.num_rows
+        if total >= sample_size:
+            break
+    if not batches:
+        return None
+    return pa.concat_tables(batches).slice(0, sample_size)
+
+
+def _parquet_data_files(builder: Any, split: str, token: Optional[str]) -> Optional[tuple]:
+    """Filesystem and paths of a Parquet-backed split, or None for other datasets."""
+    if builder.name != "parquet":
+        return None
+    data_files = (builder.config.data_files or {}).get(split)
+    if not data_files:
+        return None
+    storage_options = {"token": token} if str(data_files[0]).startswith("hf://") else {}
+    fs, _ = fsspec.core.url_to_fs(str(data_files[0]), **storage_options)
+    return fs, [fs._strip_protocol(str(path)) for path in data_files]
+
+
+# Footers are one range read each; past this many files, sampling is cheaper
+_FOOTER_STATS_MAX_FILES = 64
+
+
+def _footer_min_max(fs: Any, path: str) -> Dict[str, Optional[tuple]]:
+    """Per top-level column (min, max) from one Parquet footer; None if any row group lacks them."""
+    with fs.open(path, "rb") as f:
+        metadata = pq.ParquetFile(f).metadata
+    ranges: Dict[str, Optional[tuple]] = {}
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        for j in range(row_group.num_columns):
+            chunk = row_group.column(j)
+            name = chunk.path_in_schema
+            if "." in name or ranges.get(name, ()) is None:
+                continue
+            stats = chunk.statistics
+            if stats is None or not stats.has_min_max:
+                ranges[name] = None
+                continue
+            low, high = stats.min, stats.max
+            if name in ranges:
+                low, high = min(low, ranges[name][0]), max(high, ranges[name][1])
+            ranges[name] = (low, high)
+    return ranges
+
+
+def _parquet_min_max(fs: Any, paths: List[str]) -> Dict[str, tuple]:
+    """Exact split-wide (min, max) per numeric column, read from Parquet footers only."""
+    if len(paths) > _FOOTER_STATS_MAX_FILES:
+        return {}
+    per_file = list(_stats_pool().map(lambda path: _footer_min_max(fs, path), paths))
+    result = {}
+    for name in set().union(*per_file):
+        ranges = [ranges.get(name) for ranges in per_file]
+        if any(r is None for r in ranges):
+            continue
+        low, high = min(r[0] for r in ranges), max(r[1] for r in ranges)
+        if isinstance(low, (int, float)) and math.isfinite(low) and math.isfinite(high):
+            result[name] = (float(low), float(high))
+    return result
+
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Enough of a file to reach the JPEG frame header past typical EXIF blocks
+_IMAGE_HEADER_BYTES = 64 * 1024
+
+
+def _jpeg_size(data: bytes) -> Optional[tuple]:
+    """Walk JPEG marker segments up to the first SOFn frame header."""
+    i, end = 2, len(data)
+    while i + 9 <= end:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # standalone markers
+            i += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
+
+def _header_image_size(data: bytes) -> Optional[tuple]:
+    """(width, height) from PNG/GIF/JPEG header bytes; None for other formats."""
+    if data.startswith(_PNG_SIGNATURE) and data[12:16] == b"IHDR":
+        return struct.unpack(">II", data[16:24])
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", data[6:10])
+    if data.startswith(b"\xff\xd8"):
+        return _jpeg_size(data)
+    return None
+
+
+def _image_size(value: Dict[str, Any]) -> Optional[tuple]:
+    """Read (width, height) of an undecoded image from its header only.
+
+    Common formats are parsed directly; anything else goes through PIL, which
+    also only reads the header until pixel data is requested.
+    """
+    try:
+        if value.get("bytes"):
+            data = value["bytes"]
+            size = _header_image_size(data)
+            if size is None:
+                with PILImage.open(io.BytesIO(data)) as img:
+                    size = img.size
+            return size
+        if value.get("path"):
+            with open(value["path"], "rb") as f:
+                size = _header_image_size(f.read(_IMAGE_HEADER_BYTES))
+            if size is None:
+                with PILImage.open(value["path"]) as img:
+                    size = img.size
+            return size
+    except Exception:
+        return None
+    return None
+
+
+def _compute_column_stats(column: pa.ChunkedArray, feature: Any) -> Dict[str, Any]:
+    """Compute statistics for one sampled column with Arrow compute kernels."""
+    valid = pc.drop_null(column)
+    col_type = column.type
+    stats_dict = {
+        "count": len(valid),
+        "null_count": column.null_count,
+    }
+
+    # Numeric stats
+    if pa.types.is_integer(col_type) or pa.types.is_floating(col_type) or pa.types.is_boolean(col_type):
+        numeric = pc.cast(valid, pa.float64())
+        if pa.types.is_floating(col_type):
+            numeric = numeric.filter(pc.is_finite(numeric))
+        if len(numeric):
+            # One contiguous float64 buffer; deviations are computed once and
+            # shared by std, skew and outlier count
+            arr = numeric.to_numpy()
+            mean = float(arr.mean())
+            dev = arr - mean
+            sq_dev = dev * dev
+            std = float(np.sqrt(sq_dev.mean()))
+            median = float(np.median(arr))
+
+            outliers = 0
+            skew = 0
+            if std > 0:
+                # Outliers (simple Z-score > 3)
+                outliers = int(np.count_nonzero(sq_dev > 9 * std * std))
+                # Skewness (simple calculation)
+                # einsum contracts dev^2 * dev without materializing the product
+                skew = float(np.einsum("i,i->", sq_dev, dev) / len(arr) / (std ** 3))
+
+            stats_dict.update({
+                "min": float(arr.min()),
+                "max": float(arr.max()),
+                "mean": mean,
+                "median": median,
+                "std_dev": std,
+                "skew": skew,
+                "outlier_count": outliers,
+            })
+
+    if not len(valid):
+        return stats_dict
+
+    # Categorical / Text stats
+    is_text = pa.types.is_string(col_type) or pa.types.is_large_string(col_type)
+    if is_text:
+        # Text specific stats
+        stats_dict["avg_text_length"] = pc.sum(pc.utf8_length(valid)).as_py() / len(valid)
+
+        # PII scan on a small sample of text
+        pii_report = _scan_for_pii_and_sensitive(valid.slice(0, 10).to_pylist())
+        if pii_report["pii_found"] or pii_report["sensitive_found"]:
+            stats_dict["most_common"] = f"[FLAGGED: PII/Sensitive - {', '.join(pii_report['matches'])}]"
+
+    # Resolve the feature's kind once for the checks below
+    is_class_label = isinstance(feature, lazy_datasets().ClassLabel)
+    is_image = 'Image' in type(feature).__name__
+
+    distinct_values = distinct_counts = None
+    if is_text or pa.types.is_integer(col_type) or pa.types.is_boolean(col_type):
+        # value_counts keeps first-occurrence order, so argmax breaks ties like Counter
+        value_counts = pc.value_counts(valid)
+        distinct_values = value_counts.field("values")
+        distinct_counts = value_counts.field("counts")
+        stats_dict["unique_count"] = len(value_counts)
+        if not stats_dict.get("most_common"):
+            top = pc.index(distinct_counts, pc.max(distinct_counts)).as_py()
+            stats_dict["most_common"] = distinct_values[top].as_py()
+
+    # Label distribution (int2str maps the whole list in one call)
+    if is_class_label and distinct_values is not None:
+        stats_dict["label_distribution"] = dict(
+            zip(feature.int2str(distinct_values.to_pylist()), distinct_counts.to_pylist())
+        )
+
+    # Image stats (undecoded {bytes, path} structs; only headers are read)
+    if is_image:
+        sizes = [size for size in map(_image_size, valid.to_pylist()) if size]
+        if sizes:
+            widths = [w for w, _ in sizes]
+            heights = [h for _, h in sizes]
+            stats_dict["image_stats"] = {
+                "avg_width": sum(widths) / len(widths),
+                "avg_height": sum(heights) / len(heights),
+                "min_size": [min(widths), min(heights)],
+                "max_size": [max(widths), max(heights)]
+            }
+
+    return stats_dict
+
+
+def _load_persisted_split_statistics(
+    repo_id: str, revision: str, config: str, split: str, sample_size: int
+) -> Optional[SplitStatisticsResponse]:
+    """Fetch split statistics stored for an exact upstream commit, if any."""
+    try:
+        row = DatasetStatsCache.get_or_none(
+            (DatasetStatsCache.repo_id == repo_id)
+            & (DatasetStatsCache.revision == revision)
+            & (DatasetStatsCache.config == config)
+            & (DatasetStatsCache.split == split)
+            & (DatasetStatsCache.sample_size == sample_size)
+        )
+        if row is not None:
+            return SplitStatisticsResponse.model_validate_json(row.stats_json)
+    except Exception as e:
+        logger.warning(f"Could not read persisted stats for {repo_id}/{split}: {e}")
+    return None
+
+
+def _persist_split_statistics(
+    repo_id: str, revision: str, config: str, split: str, sample_size: int,
+    stats: SplitStatisticsResponse,
+) -> None:
+    """Store split statistics for an exact upstream commit (best effort)."""
+    stats_json = stats.model_dump_json()
+    try:
+        DatasetStatsCache.insert(
+            repo_id=repo_id,
+            revision=revision,
+            config=config,
+            split=split,
+            sample_size=sample_size,
+            stats_json=stats_json,
+        ).on_conflict(
+            conflict_target=(
+                DatasetStatsCache.repo_id,
+                DatasetStatsCache.revision,
+                DatasetStatsCache.config,
+                DatasetStatsCache.split,
+                DatasetStatsCache.sample_size,
+            ),
+            update={
+                DatasetStatsCache.stats_json: stats_json,
+                DatasetStatsCache.computed_at: datetime.now(timezone.utc),
+            },
+        ).execute()
+    except Exception as e:
+        logger.warning(f"Could not persist stats for {repo_id}/{split}: {e}")
+
+
 def get_split_statistics(
     namespace: str,
     repo: str,
@@ -306,131 +1012,92 @@ def get_split_statistics(
 ) -> SplitStatisticsResponse:
     """
     Calculate statistics for a specific split by sampling data.
+
+    Results are stored per upstream commit, so a split is only sampled again
+    once the dataset changes. Without a resolvable commit they are computed
+    every time.
     """
     repo_id = f"{namespace}/{repo}"
     current_config = config if config and config != "default" else None
-    
+    config_key = current_config or "default"
+
+    revision = _get_upstream_revision(repo_id, token=token)
+    if revision:
+        cached = _load_persisted_split_statistics(repo_id, revision, config_key, split, sample_size)
+        if cached is not None:
+            return cached
+
+    stats = _compute_split_statistics(repo_id, current_config, split, token, sample_size, revision)
+    if revision:
+        _persist_split_statistics(repo_id, revision, config_key, split, sample_size, stats)
+    return stats
+
+
+def _compute_split_statistics(
+    repo_id: str,
+    config: Optional[str],
+    split: str,
+    token: Optional[str],
+    sample_size: int,
+    revision: Optional[str] = None,
+) -> SplitStatisticsResponse:
+    """Sample a split and compute its statistics (uncached).
+
+    The sample is pulled as Arrow record batches so every column is reduced
+    with Arrow compute kernels instead of per-row Python loops. For Parquet
+    splits, numeric min/max are exact: they come from the files' footer
+    statistics rather than the sample.
+    """
     try:
-        dataset = load_dataset(
+        builder = lazy_datasets().load_dataset_builder(
             repo_id,
-            name=current_config,
-            split=split,
-            streaming=True,
+            name=config,
             token=token,
-            trust_remote_code=True
+            trust_remote_code=True,
+            revision=revision,
         )
+        dataset = builder.as_streaming_dataset(split=split)
         
         # Take sample with a safety limit
-        sample = []
-        for i, item in enumerate(dataset.take(sample_size)):
-            sample.append(item)
-            if i >= sample_size - 1:
-                break
-                
-        if not sample:
+        sample = _take_arrow_sample(dataset, sample_size)
+        if sample is None or sample.num_rows == 0:
             raise ValueError("Empty split")
         
         column_stats = {}
-        features = dataset.features
-        
-        for key in sample[0].keys():
-            values = [row[key] for row in sample if key in row]
-            valid_values = [v for v in values if v is not None]
-            
-            stats_dict = {
-                "count": len(valid_values),
-                "null_count": len(values) - len(valid_values),
-            }
-            
-            # Numeric stats
-            numeric_values = []
-            for v in valid_values:
-                if isinstance(v, (int, float)):
-                    if not np.isnan(v) and not np.isinf(v):
-                        numeric_values.append(float(v))
-            
-            if numeric_values:
-                arr = np.array(numeric_values)
-                mean = float(np.mean(arr))
-                std = float(np.std(arr))
-                median = float(np.median(arr))
-                
-                # Outliers (simple Z-score > 3)
-                outliers = 0
-                if std > 0:
-                    outliers = int(np.sum(np.abs(arr - mean) > 3 * std))
-                
-                # Skewness (simple calculation)
-                skew = 0
-                if std > 0:
-                    skew = float(np.mean((arr - mean) ** 3) / (std ** 3))
-
-                stats_dict.update({
-                    "min": float(np.min(arr)),
-                    "max": float(np.max(arr)),
-                    "mean": mean,
-                    "median": median,
-                    "std_dev": std,
-                    "skew": skew,
-                    "outlier_count": outliers,
-                })
-            
-            # Categorical / Text stats
-            if valid_values:
-                if isinstance(valid_values[0], str):
-                    # Text specific stats
-                    lengths = [len(v) for v in valid_values]
-                    stats_dict["avg_text_length"] = sum(lengths) / len(lengths)
-                    
-                    # PII scan on a small sample of text
-                    pii_report = _scan_for_pii_and_sensitive(" ".join(valid_values[:10]))
-                    if pii_report["pii_found"] or pii_report["sensitive_found"]:
-                        stats_dict["most_common"] = f"[FLAGGED: PII/Sensitive - {', '.join(pii_report['matches'])}]"
-                
-                if isinstance(valid_values[0], (str, int, bool)):
-                    unique_values = set(valid_values)
-                    stats_dict.update({
-                        "unique_count": len(unique_values),
-                    })
-                    if not stats_dict.get("most_common"):
-                         stats_dict["most_common"] = max(unique_values, key=valid_values.count) if valid_values else None
-                
-                # Label distribution
-                if isinstance(features.get(key), ClassLabel):
-                    dist = {}
-                    for v in valid_values:
-                        label_name = features[key].int2str(v) if hasattr(features[key], 'int2str') else str(v)
-                        dist[label_name] = dist.get(label_name, 0) + 1
-                    stats_dict["label_distribution"] = dist
-
-                # Image stats
-                if 'Image' in type(features.get(key)).__name__:
-                    widths = []
-                    heights = []
-                    for img in valid_values:
-                        if hasattr(img, 'size'): # PIL image
-                            widths.append(img.size[0])
-                            heights.append(img.size[1])
-                    if widths:
-                        stats_dict["image_stats"] = {
-                            "avg_width": sum(widths) / len(widths),
-                            "avg_height": sum(heights) / len(heights),
-                            "min_size": [min(widths), min(heights)],
-                            "max_size": [max(widths), max(heights)]
-                        }
-            
-            # Schema warnings
-            stats_dict["schema_warnings"] = validate_schema_consistency(sample, {key: features[key]})
-            
+        features = dataset.features or {}
+        schema_warnings = validate_schema_consistency(sample, features)
+
+        # Columns are independent, and Arrow kernels/numpy reductions release
+        # the GIL, so wide tables are reduced on the shared stats pool
+        def column_stats_for(key: str) -> Dict[str, Any]:
+            return _compute_column_stats(sample.column(key), features.get(key))
+
+        keys = sample.column_names
+        if len(keys) > 1:
+            results = list(_stats_pool().map(column_stats_for, keys))
+        else:
+            results = [column_stats_for(key) for key in keys]
+
+        footer_ranges = {}
+        try:
+            parquet_files = _parquet_data_files(builder, split, token)
+            if parquet_files is not None:
+                footer_ranges = _parquet_min_max(*parquet_files)
+        except Exception as e:
+            logger.debug(f"No footer statistics for {repo_id}/{split}: {e}")
+
+        for key, stats_dict in zip(keys, results):
+            if "min" in stats_dict and key in footer_ranges:
+                stats_dict["min"], stats_dict["max"] = footer_ranges[key]
+            stats_dict["schema_warnings"] = schema_warnings.get(key, [])
             column_stats[key] = ColumnStatistics(**stats_dict)
         
         return SplitStatisticsResponse(
             split=split,
-            sample_size=len(sample),
+            sample_size=sample.num_rows,
             column_statistics=column_stats
         )
         
     except Exception as e:
         logger.error(f"Failed stats for {repo_id}/{split}: {e}")
         raise
-
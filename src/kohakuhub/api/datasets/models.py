@@ -63,6 +63,11 @@ class SplitStatisticsResponse(BaseModel):
     sample_size: int
     column_statistics: Dict[str, ColumnStatistics]
 
+class AllSplitStatisticsResponse(BaseModel):
+    config: str
+    statistics: Dict[str, SplitStatisticsResponse] = Field(default_factory=dict)
+    errors: Dict[str, str] = Field(default_factory=dict)  # split -> failure reason
+
 class DatasetRowResponse(BaseModel):
     rows: List[Dict[str, Any]]
     offset: int
@@ -75,6 +80,10 @@ class DatasetInfoResponse(BaseModel):
     configs: List[str]
     info: Dict[str, Any]  # Complex nested info from builder
 
+class DatasetPreviewResponse(BaseModel):
+    info: DatasetInfoResponse
+    rows: DatasetRowResponse
+
 
 class AccessRequestCreate(BaseModel):
     reason: str
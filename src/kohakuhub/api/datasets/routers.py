@@ -1,6 +1,8 @@
-from typing import List, Optional
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from starlette.concurrency import run_in_threadpool
 
 from kohakuhub.api.datasets import viewer, metadata
@@ -8,31 +10,36 @@ from kohakuhub.auth.dependencies import get_optional_user, get_current_user
 from kohakuhub.auth.permissions import check_repo_read_permission, check_repo_write_permission
 from kohakuhub.db import User, Repository, DatasetAccessRequest, DatasetLineage, DatasetSnapshot
 from kohakuhub.datasetviewer.rate_limit import check_rate_limit_dependency
+from kohakuhub.db_operations import get_repository
 from kohakuhub.config import cfg
 from .models import (
     DatasetMetadata, 
     DatasetRowResponse, 
     DatasetInfoResponse, 
+    DatasetPreviewResponse,
     SplitStatisticsResponse,
+    AllSplitStatisticsResponse,
     DatasetStatistics,
     AccessRequestCreate,
     AccessRequestResponse,
     DatasetLineageCreate,
     LineageResponse
 )
-import json
+import orjson
 from datetime import datetime
 
 router = APIRouter(prefix="/datasets", tags=["Dataset Viewer"])
 
+# Split statistics each stream a sample from upstream; cap how many run at once
+ALL_STATS_CONCURRENCY = 4
+
 async def _get_repo_with_read_access(namespace: str, repo_name: str, user: Optional[User]) -> Repository:
     """Helper to get a repository and verify read access."""
     full_id = f"{namespace}/{repo_name}"
     # Use repo_type="dataset" to ensure we are looking in the right place
-    # Note: KohakuHub uses Repository model for models, datasets, and spaces
-    repo = Repository.get_or_none(
-        (Repository.namespace == namespace) & (Repository.name == repo_name)
-    )
+    # Note: KohakuHub uses Repository model for models, datasets, and spaces;
+    # (repo_type, namespace, name) is the unique index, so this is one key lookup
+    repo = get_repository("dataset", namespace, repo_name)
     
     if not repo:
         raise HTTPException(status_code=404, detail=f"Dataset '{full_id}' not found")
@@ -42,10 +49,44 @@ async def _get_repo_with_read_access(namespace: str, repo_name: str, user: Optio
     return repo
 
 
+async def _viewer_revision(namespace: str, repo: str, *parts, ref: str = "main") -> Tuple[str, Optional[str]]:
+    """Resolve the revision to serve and its ETag (None if upstream is unreachable)."""
+    return await run_in_threadpool(
+        metadata.get_viewer_revision,
+        namespace,
+        repo,
+        *parts,
+        ref=ref,
+        token=cfg.admin.secret_token,
+    )
+
+
+def _not_modified(request: Request, response: Response, etag: Optional[str]) -> Optional[Response]:
+    """Attach validators to the response; return a 304 if the client copy is current.
+
+    Responses are marked no-store so only explicit conditional requests are
+    served from the client's copy.
+    """
+    if etag is None:
+        return None
+
+    headers = {"ETag": etag, "Cache-Control": "no-store"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
+
+
 @router.get("/{namespace}/{repo}/viewer/info", response_model=DatasetInfoResponse)
 async def get_dataset_info(
     namespace: str,
     repo: str,
+    request: Request,
+    response: Response,
     ref: str = Query("main", description="Git revision or branch"),
     user: Optional[User] = Depends(get_optional_user),
     identifier: str = Depends(check_rate_limit_dependency),
@@ -55,6 +96,10 @@ async def get_dataset_info(
     Requires read access to the repository.
     """
     await _get_repo_with_read_access(namespace, repo, user)
+
+    revision, etag = await _viewer_revision(namespace, repo, "info", ref=ref)
+    if (not_modified := _not_modified(request, response, etag)) is not None:
+        return not_modified
     
     # Use system token after verifying user permission
     system_token = cfg.admin.secret_token
@@ -64,7 +109,7 @@ async def get_dataset_info(
             viewer.get_dataset_info, 
             namespace, 
             repo, 
-            ref=ref, 
+            ref=revision, 
             token=system_token
         )
     except Exception as e:
@@ -75,6 +120,8 @@ async def get_dataset_info(
 async def get_dataset_rows(
     namespace: str,
     repo: str,
+    request: Request,
+    response: Response,
     config: str = Query("default", description="Dataset configuration/subset"),
     split: str = Query("train", description="Dataset split name"),
     offset: int = Query(0, ge=0),
@@ -89,11 +136,15 @@ async def get_dataset_rows(
     Supports SQL-like filtering expressions (e.g., 'label == 1').
     """
     await _get_repo_with_read_access(namespace, repo, user)
+
+    revision, etag = await _viewer_revision(namespace, repo, "rows", config, split, offset, limit, where, ref=ref)
+    if (not_modified := _not_modified(request, response, etag)) is not None:
+        return not_modified
     
     system_token = cfg.admin.secret_token
     
     try:
-        return await run_in_threadpool(
+        result = await run_in_threadpool(
             viewer.get_dataset_rows,
             namespace, 
             repo, 
@@ -101,18 +152,71 @@ async def get_dataset_rows(
             split=split, 
             offset=offset, 
             limit=limit, 
-            ref=ref, 
+            ref=revision, 
             token=system_token,
             where=where
         )
+    except viewer.WhereFilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch dataset rows: {str(e)}")
 
+    # Errors are reported in the body; don't let clients revalidate against them
+    if result.error and etag:
+        del response.headers["ETag"]
+    return result
+
+
+@router.get("/{namespace}/{repo}/viewer/preview", response_model=DatasetPreviewResponse)
+async def get_dataset_preview(
+    namespace: str,
+    repo: str,
+    request: Request,
+    response: Response,
+    config: Optional[str] = Query(None, description="Dataset configuration/subset (defaults to the first one)"),
+    split: str = Query("train", description="Dataset split name"),
+    limit: int = Query(100, ge=1, le=500),
+    ref: str = Query("main", description="Git revision or branch"),
+    user: Optional[User] = Depends(get_optional_user),
+    identifier: str = Depends(check_rate_limit_dependency),
+):
+    """
+    Get dataset info and the first rows of a split in a single request.
+    Saves the viewer page a round trip over calling /viewer/info and /viewer/rows.
+    """
+    await _get_repo_with_read_access(namespace, repo, user)
+
+    revision, etag = await _viewer_revision(namespace, repo, "preview", config, split, limit, ref=ref)
+    if (not_modified := _not_modified(request, response, etag)) is not None:
+        return not_modified
+
+    system_token = cfg.admin.secret_token
+
+    try:
+        result = await run_in_threadpool(
+            viewer.get_dataset_preview,
+            namespace,
+            repo,
+            config=config,
+            split=split,
+            limit=limit,
+            ref=revision,
+            token=system_token,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch dataset preview: {str(e)}")
+
+    if result.rows.error and etag:
+        del response.headers["ETag"]
+    return result
+
 
 @router.get("/{namespace}/{repo}/metadata", response_model=DatasetMetadata)
 async def get_metadata(
     namespace: str,
     repo: str,
+    request: Request,
+    response: Response,
     config: Optional[str] = Query(None, description="Dataset configuration"),
     user: Optional[User] = Depends(get_optional_user),
     identifier: str = Depends(check_rate_limit_dependency),
@@ -122,11 +226,15 @@ async def get_metadata(
     Auto-detects properties using the datasets library.
     """
     await _get_repo_with_read_access(namespace, repo, user)
+
+    _, etag = await _viewer_revision(namespace, repo, "metadata", config)
+    if (not_modified := _not_modified(request, response, etag)) is not None:
+        return not_modified
     
     system_token = cfg.admin.secret_token
     
     try:
-        return await run_in_threadpool(
+        result = await run_in_threadpool(
             metadata.get_dataset_metadata,
             namespace,
             repo,
@@ -136,6 +244,10 @@ async def get_metadata(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to extract metadata: {str(e)}")
 
+    if result.error and etag:
+        del response.headers["ETag"]
+    return result
+
 
 @router.get("/{namespace}/{repo}/configs")
 async def get_configs(
@@ -195,6 +307,62 @@ async def get_split_stats(
         raise HTTPException(status_code=500, detail=f"Failed to calculate split statistics: {str(e)}")
 
 
+@router.get("/{namespace}/{repo}/all-stats", response_model=AllSplitStatisticsResponse)
+async def get_all_split_stats(
+    namespace: str,
+    repo: str,
+    config: Optional[str] = Query(None, description="Dataset configuration"),
+    sample_size: int = Query(1000, ge=10, le=10000),
+    user: Optional[User] = Depends(get_optional_user),
+    identifier: str = Depends(check_rate_limit_dependency),
+):
+    """
+    Calculate statistics for every split of a configuration in one request.
+    Splits are sampled concurrently; a failing split is reported in `errors`.
+    """
+    await _get_repo_with_read_access(namespace, repo, user)
+
+    system_token = cfg.admin.secret_token
+
+    try:
+        meta = await run_in_threadpool(
+            metadata.get_dataset_metadata,
+            namespace,
+            repo,
+            config=config,
+            token=system_token
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to extract metadata: {str(e)}")
+    if meta.error:
+        raise HTTPException(status_code=500, detail=f"Failed to extract metadata: {meta.error}")
+
+    semaphore = asyncio.Semaphore(ALL_STATS_CONCURRENCY)
+
+    async def split_stats(split: str):
+        async with semaphore:
+            try:
+                return split, await run_in_threadpool(
+                    metadata.get_split_statistics,
+                    namespace,
+                    repo,
+                    split,
+                    config=meta.current_config,
+                    token=system_token,
+                    sample_size=sample_size
+                )
+            except Exception as e:
+                return split, e
+
+    response = AllSplitStatisticsResponse(config=meta.current_config)
+    for split, result in await asyncio.gather(*(split_stats(s) for s in meta.splits)):
+        if isinstance(result, Exception):
+            response.errors[split] = str(result)
+        else:
+            response.statistics[split] = result
+    return response
+
+
 @router.get("/{namespace}/{repo}/request-access", response_model=Dict[str, Any])
 async def get_access_request_status(
     namespace: str,
@@ -204,7 +372,7 @@ async def get_access_request_status(
     """Get the status of the current user's access request."""
     # Note: We don't use _get_repo_with_read_access here because 
     # that would fail if the user doesn't have access yet.
-    repo_row = Repository.get_or_none(Repository.namespace == namespace, Repository.name == repo)
+    repo_row = get_repository("dataset", namespace, repo)
     if not repo_row:
         raise HTTPException(status_code=404, detail="Repository not found")
     
@@ -236,9 +404,7 @@ async def request_dataset_access(
     user: User = Depends(get_current_user),
 ):
     """Request access to a gated dataset."""
-    db_repo = Repository.get_or_none(
-        (Repository.namespace == namespace) & (Repository.name == repo)
-    )
+    db_repo = get_repository("dataset", namespace, repo)
     if not db_repo:
         raise HTTPException(status_code=404, detail="Dataset not found")
     
@@ -312,9 +478,7 @@ async def approve_dataset_access(
     user: User = Depends(get_current_user),
 ):
     """Approve an access request (Owner/Admin only)."""
-    db_repo = Repository.get_or_none(
-        (Repository.namespace == namespace) & (Repository.name == repo)
-    )
+    db_repo = get_repository("dataset", namespace, repo)
     check_repo_write_permission(db_repo, user)
     
     req = DatasetAccessRequest.get_or_none(DatasetAccessRequest.id == request_id)
@@ -338,28 +502,27 @@ async def add_dataset_lineage(
     user: User = Depends(get_current_user),
 ):
     """Record data lineage for a dataset revision (Owner/Admin only)."""
-    db_repo = Repository.get_or_none(
-        (Repository.namespace == namespace) & (Repository.name == repo)
-    )
+    db_repo = get_repository("dataset", namespace, repo)
     check_repo_write_permission(db_repo, user)
     
     lineage = DatasetLineage.create(
         repository=db_repo,
         revision=lineage_req.revision,
-        upstream_repos=json.dumps(lineage_req.upstream_repos),
+        upstream_repos=orjson.dumps(lineage_req.upstream_repos).decode(),
         script_path=lineage_req.script_path,
         script_hash=lineage_req.script_hash,
         mapping_function_hash=lineage_req.mapping_function_hash,
-        config=json.dumps(lineage_req.config) if lineage_req.config else None
+        config=orjson.dumps(lineage_req.config).decode() if lineage_req.config else None
     )
     
+    # Echo the request's values rather than decoding what was just encoded
     return LineageResponse(
         revision=lineage.revision,
-        upstream_repos=json.loads(lineage.upstream_repos),
+        upstream_repos=lineage_req.upstream_repos,
         script_path=lineage.script_path,
         script_hash=lineage.script_hash,
         mapping_function_hash=lineage.mapping_function_hash,
-        config=json.loads(lineage.config) if lineage.config else None,
+        config=lineage_req.config or None,
         created_at=lineage.created_at
     )
 
@@ -373,19 +536,37 @@ async def get_dataset_lineage(
     """Get data lineage history for a dataset."""
     db_repo = await _get_repo_with_read_access(namespace, repo, user)
     
-    lineages = DatasetLineage.select().where(DatasetLineage.repository == db_repo).order_by(DatasetLineage.created_at.desc())
+    # Only the response columns, as plain dicts; JSON columns are decoded with orjson
+    lineages = list(
+        DatasetLineage.select(
+            DatasetLineage.revision,
+            DatasetLineage.upstream_repos,
+            DatasetLineage.script_path,
+            DatasetLineage.script_hash,
+            DatasetLineage.mapping_function_hash,
+            DatasetLineage.config,
+            DatasetLineage.created_at,
+        )
+        .where(DatasetLineage.repository == db_repo)
+        .order_by(DatasetLineage.created_at.desc())
+        .dicts()
+    )
     
-    return [
-        LineageResponse(
-            revision=l.revision,
-            upstream_repos=json.loads(l.upstream_repos),
-            script_path=l.script_path,
-            script_hash=l.script_hash,
-            mapping_function_hash=l.mapping_function_hash,
-            config=json.loads(l.config) if l.config else None,
-            created_at=l.created_at
-        ) for l in lineages
-    ]
+    for row in lineages:
+        row["upstream_repos"] = orjson.loads(row["upstream_repos"]) if row["upstream_repos"] else []
+        row["config"] = orjson.loads(row["config"]) if row["config"] else None
+    return [LineageResponse(**row) for row in lineages]
+
+
+def _metadata_signature(meta_json: str) -> str:
+    """SHA-256 signature of a snapshot's metadata dump."""
+    return hashlib.sha256(meta_json.encode()).hexdigest()
+
+
+def _sign_metadata(meta: DatasetMetadata) -> tuple[str, str]:
+    """Serialize snapshot metadata and compute its signature (blocking)."""
+    meta_json = meta.model_dump_json()
+    return meta_json, _metadata_signature(meta_json)
 
 
 @router.post("/{namespace}/{repo}/snapshot")
@@ -396,9 +577,7 @@ async def create_dataset_snapshot(
     user: User = Depends(get_current_user),
 ):
     """Freeze a dataset revision and create a signed snapshot (Owner/Admin only)."""
-    db_repo = Repository.get_or_none(
-        (Repository.namespace == namespace) & (Repository.name == repo)
-    )
+    db_repo = get_repository("dataset", namespace, repo)
     check_repo_write_permission(db_repo, user)
 
     # In a real app, we would hash the actual data files. 
@@ -410,10 +589,7 @@ async def create_dataset_snapshot(
         repo,
         token=system_token
     )
-    
-    import hashlib
-    meta_json = meta.json()
-    signature = hashlib.sha256(meta_json.encode()).hexdigest()
+    meta_json, signature = await run_in_threadpool(_sign_metadata, meta)
     
     snapshot = DatasetSnapshot.create(
         repository=db_repo,
@@ -467,10 +643,11 @@ async def verify_dataset_snapshot(
     if not snapshot or snapshot.repository_id != db_repo.id:
         raise HTTPException(status_code=404, detail="Snapshot not found")
         
-    # Re-calculate or just compare stored signature
+    # Re-hash the stored metadata dump against the recorded signature
     # In a real production system, this would re-hash the data files from S3/LakeFS
+    signature = await run_in_threadpool(_metadata_signature, snapshot.metadata_dump)
     return {
-        "valid": True,
+        "valid": signature == snapshot.signature,
         "snapshot_id": snapshot.id,
         "revision": snapshot.revision,
         "signature": snapshot.signature,
@@ -1,41 +1,93 @@
-import os
 import io
+import ast
 import base64
 import datetime
-from typing import Any, Dict, List, Optional
+import operator
+import threading
+import wave
+from types import CodeType
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as pads
 from PIL import Image
-from functools import lru_cache
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+from functools import lru_cache, reduce
 
-import datasets
-from datasets import load_dataset_builder, load_dataset, get_dataset_config_names, get_dataset_split_names
-
-from kohakuhub.config import cfg
 from kohakuhub.logger import get_logger
-from .models import DatasetInfoResponse, DatasetRowResponse
+from .lazy import lazy_datasets
+from .metadata import _load_card_dataset_infos, _parquet_data_files, _token_key
+from .models import DatasetInfoResponse, DatasetPreviewResponse, DatasetRowResponse
 
 logger = get_logger("DatasetsViewer")
 
-# Initialize HF_ENDPOINT globally
-_BASE_URL = cfg.app.base_url or "http://localhost:48888"
-os.environ["HF_ENDPOINT"] = _BASE_URL.rstrip("/")
-
 # Production limits
 MAX_IMG_SIZE_BYTES = 2 * 1024 * 1024  # 2MB limit for base64 inline images
 MAX_AUDIO_DURATION_SEC = 300  # 5 minutes limit for inline audio
 
-@lru_cache(maxsize=128)
+# Best-case compression ratio per encoder: images whose raw pixel size is more
+# than this many times the inline limit can't fit and are skipped unencoded
+_MAX_COMPRESSION_RATIO = {"JPEG": 20, "WEBP": 20}
+_DEFAULT_COMPRESSION_RATIO = 3
+
+# Expiring caches so paging through a split doesn't re-resolve the dataset
+# upstream on every request. The routers pass the commit SHA their ETag was
+# built from, so a cached body never outlives the commit it describes; moving
+# refs like "main" passed directly still refresh on expiry.
+# Token digests stand in for tokens in the keys, as in metadata.py.
+_INFO_CACHE: TTLCache = TTLCache(maxsize=128, ttl=600)
+_BUILDER_CACHE: TTLCache = TTLCache(maxsize=64, ttl=600)
+_ROWS_CACHE: TTLCache = TTLCache(maxsize=256, ttl=60)
+_CACHE_LOCK = threading.Lock()
+
+
+def _dataset_builder(repo_id: str, name: Optional[str], ref: str, token: Optional[str]) -> Any:
+    """Load a dataset builder, reusing one opened recently for the same revision."""
+    key = (repo_id, name, ref, _token_key(token))
+    with _CACHE_LOCK:
+        builder = _BUILDER_CACHE.get(key)
+    if builder is None:
+        builder = lazy_datasets().load_dataset_builder(
+            repo_id, name, token=token, trust_remote_code=True, revision=ref
+        )
+        with _CACHE_LOCK:
+            _BUILDER_CACHE[key] = builder
+    return builder
+
+
+@cached(
+    _INFO_CACHE,
+    key=lambda namespace, repo, ref="main", token=None: hashkey(namespace, repo, ref, _token_key(token)),
+    lock=_CACHE_LOCK,
+)
 def get_dataset_info(namespace: str, repo: str, ref: str = "main", token: Optional[str] = None) -> DatasetInfoResponse:
     """
     Get dataset information (configs, splits, features).
+
+    Datasets whose card declares features and split sizes for every config
+    are answered from the README alone; others go through dataset builders.
     """
     repo_id = f"{namespace}/{repo}"
+    datasets = lazy_datasets()
+
+    try:
+        card_infos = _load_card_dataset_infos(repo_id, ref, token)
+    except Exception as e:
+        logger.debug(f"No usable dataset card info for {repo_id}: {e}")
+        card_infos = {}
+    if card_infos:
+        return DatasetInfoResponse(
+            configs=list(card_infos),
+            info={config: _info_dict(info) for config, info in card_infos.items()},
+        )
     
     try:
         # Get all configs
         try:
-            configs = get_dataset_config_names(repo_id, token=token, trust_remote_code=True, revision=ref)
+            configs = datasets.get_dataset_config_names(repo_id, token=token, trust_remote_code=True, revision=ref)
         except (ValueError, Exception) as e:
             logger.warning(f"Failed to get configs for {repo_id}: {e}")
             configs = ["default"]
@@ -43,26 +95,12 @@ def get_dataset_info(namespace: str, repo: str, ref: str = "main", token: Option
         info_data = {}
         for config in configs:
             try:
-                builder = load_dataset_builder(repo_id, config, token=token, trust_remote_code=True, revision=ref)
-                builder_info = builder.info
-                
-                info_data[config] = {
-                    "description": builder_info.description,
-                    "citation": builder_info.citation,
-                    "homepage": builder_info.homepage,
-                    "license": builder_info.license,
-                    "features": builder_info.features.to_dict() if builder_info.features else None,
-                    "splits": {
-                        split_name: {
-                            "num_examples": split_info.num_examples,
-                            "dataset_name": split_info.dataset_name
-                        } for split_name, split_info in builder_info.splits.items()
-                    } if builder_info.splits else {}
-                }
+                builder = _dataset_builder(repo_id, config, ref, token)
+                info_data[config] = _info_dict(builder.info)
                 
                 # If splits are empty, try manual fetch
                 if not info_data[config]["splits"]:
-                     split_names = get_dataset_split_names(repo_id, config, token=token, trust_remote_code=True, revision=ref)
+                     split_names = datasets.get_dataset_split_names(repo_id, config, token=token, trust_remote_code=True, revision=ref)
                      info_data[config]["splits"] = {s: {} for s in split_names}
 
             except Exception as e:
@@ -75,6 +113,291 @@ def get_dataset_info(namespace: str, repo: str, ref: str = "main", token: Option
         raise
 
 
+class WhereFilterError(Exception):
+    """Invalid or unsupported `where` filter expression."""
+
+    pass
+
+
+# Everything a filter may contain: column names, literals, comparisons and
+# boolean logic. Calls, attributes and subscripts are rejected up front.
+_WHERE_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+    ast.Name, ast.Load, ast.Constant, ast.Tuple, ast.List,
+)
+_WHERE_GLOBALS = {"__builtins__": {}}
+
+
+@lru_cache(maxsize=256)
+def _compile_where(where: str) -> Tuple[ast.Expression, CodeType]:
+    """Parse and validate a `where` filter once, returning its AST and bytecode."""
+    try:
+        tree = ast.parse(where, mode="eval")
+    except SyntaxError as e:
+        raise WhereFilterError(f"Invalid filter: {e.msg}") from None
+    for node in ast.walk(tree):
+        if not isinstance(node, _WHERE_NODES):
+            raise WhereFilterError(f"Unsupported filter syntax: {type(node).__name__}")
+    return tree, compile(tree, "<where>", "eval")
+
+
+def _info_dict(info: Any) -> Dict[str, Any]:
+    """Viewer info entry for one config's DatasetInfo."""
+    return {
+        "description": info.description,
+        "citation": info.citation,
+        "homepage": info.homepage,
+        "license": info.license,
+        "features": info.features.to_dict() if info.features else None,
+        "splits": {
+            split_name: {
+                "num_examples": split_info.num_examples,
+                "dataset_name": split_info.dataset_name
+            } for split_name, split_info in info.splits.items()
+        } if info.splits else {}
+    }
+
+
+_COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+
+def _where_operand(node: ast.AST) -> Any:
+    """Column reference or literal on one side of a comparison."""
+    if isinstance(node, ast.Name):
+        return pc.field(node.id)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, int, float, bool)):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant):
+        return -node.operand.value
+    raise ValueError(f"Unsupported operand: {ast.dump(node)}")
+
+
+def _where_literals(node: ast.AST) -> List[Any]:
+    """Literal tuple/list on the right of an `in` test."""
+    if not isinstance(node, (ast.Tuple, ast.List)):
+        raise ValueError(f"Unsupported membership test: {ast.dump(node)}")
+    return [_where_operand(element) for element in node.elts]
+
+
+def _either(first: Optional[pc.Expression], second: Optional[pc.Expression]) -> Optional[pc.Expression]:
+    """Union of two error masks, where None means no row can raise."""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return first | second
+
+
+def _where_comparison(op: ast.cmpop, left: ast.AST, right: ast.AST) -> Tuple[pc.Expression, Optional[pc.Expression]]:
+    """One comparison as (value, error): its null-free Arrow result, and the
+    rows on which Python would raise instead (None for none)."""
+    if isinstance(op, (ast.In, ast.NotIn)) and isinstance(left, ast.Name):
+        # Nulls are never members, as with None in Python
+        member = pc.field(left.id).isin(_where_literals(right))
+        return (~member if isinstance(op, ast.NotIn) else member), None
+    # `col == None` / `col != None` are null checks, as in Python
+    for column, other in ((left, right), (right, left)):
+        if isinstance(other, ast.Constant) and other.value is None and isinstance(column, ast.Name):
+            if isinstance(op, ast.Eq):
+                return pc.field(column.id).is_null(), None
+            if isinstance(op, ast.NotEq):
+                return pc.field(column.id).is_valid(), None
+    compare = _COMPARISONS.get(type(op))
+    if compare is None:
+        raise ValueError(f"Unsupported comparison: {type(op).__name__}")
+    operands = [_where_operand(left), _where_operand(right)]
+    result = compare(*operands)
+    if not isinstance(result, pc.Expression):
+        raise ValueError("Comparison does not reference a column")
+    nulls = [operand.is_null() for operand in operands if isinstance(operand, pc.Expression)]
+    if isinstance(op, (ast.Eq, ast.NotEq)):
+        # Python compares None equal only to None; Arrow would yield null
+        if len(nulls) == 2:
+            both_null = nulls[0] & nulls[1]
+            fallback = both_null if isinstance(op, ast.Eq) else ~both_null
+        else:
+            fallback = isinstance(op, ast.NotEq)
+        return pc.coalesce(result, fallback), None
+    # Ordering against None raises TypeError in Python
+    return pc.coalesce(result, False), reduce(operator.or_, nulls)
+
+
+def _where_node(node: ast.AST) -> Tuple[pc.Expression, Optional[pc.Expression]]:
+    """A filter node as (value, error), following Python's short-circuiting:
+    an operand that's never evaluated can't raise."""
+    if isinstance(node, ast.BoolOp):
+        conjunction = isinstance(node.op, ast.And)
+        value, error = _where_node(node.values[0])
+        for operand in node.values[1:]:
+            operand_value, operand_error = _where_node(operand)
+            if operand_error is not None:
+                reached = value if conjunction else ~value
+                error = _either(error, reached & operand_error)
+            value = value & operand_value if conjunction else value | operand_value
+        return value, error
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        value, error = _where_node(node.operand)
+        return ~value, error
+    if isinstance(node, ast.Compare):
+        # Chained comparisons (`0 < x < 5`) are short-circuiting conjunctions
+        operands = [node.left, *node.comparators]
+        value, error = None, None
+        for op, left, right in zip(node.ops, operands, operands[1:]):
+            pair_value, pair_error = _where_comparison(op, left, right)
+            if value is None:
+                value, error = pair_value, pair_error
+                continue
+            if pair_error is not None:
+                error = _either(error, value & pair_error)
+            value = value & pair_value
+        return value, error
+    raise ValueError(f"Unsupported expression: {type(node).__name__}")
+
+
+def _where_to_expression(where: str) -> Optional[pc.Expression]:
+    """Translate a simple `where` filter into an Arrow expression.
+
+    Handles comparisons and membership tests between columns and literals
+    combined with and/or/not. Rows on which the Python filter would raise
+    (ordering against None) don't match, as in _where_matches. Returns None
+    for anything else, so the caller keeps the row-by-row filter.
+    """
+    try:
+        value, error = _where_node(_compile_where(where)[0].body)
+    except (ValueError, TypeError):
+        return None
+    return value if error is None else value & ~error
+
+
+def _where_matches(code: CodeType, row: Dict[str, Any]) -> bool:
+    """Evaluate a compiled filter on one row; rows it can't compare don't match."""
+    try:
+        return bool(eval(code, _WHERE_GLOBALS, row))
+    except TypeError:
+        return False
+
+
+# Arrow types whose to_pylist() output is already JSON-ready
+_PLAIN_TYPES = (pa.types.is_integer, pa.types.is_boolean, pa.types.is_string, pa.types.is_large_string)
+
+
+def _serialize_column(
+    column: pa.ChunkedArray, name: str, features: Any, token_per_repo_id: Optional[Dict[str, Any]]
+) -> List[Any]:
+    """Serialize one column of a page, in a single Arrow call where the type allows.
+
+    Class labels are mapped to their names with one take(), plain scalars
+    convert straight from Arrow (non-finite floats become null), and only
+    the rest (images, audio, binary, nested values, dates) is decoded and
+    serialized cell by cell.
+    """
+    feature = features.get(name)
+    kind = column.type
+    if isinstance(feature, lazy_datasets().ClassLabel) and pa.types.is_integer(kind):
+        in_range = pc.and_(pc.greater_equal(column, 0), pc.less(column, feature.num_classes))
+        if pc.all(in_range).as_py() is not False:
+            return pc.take(pa.array(feature.names), column).to_pylist()
+    elif isinstance(feature, lazy_datasets().Value):
+        if kind in (pa.float32(), pa.float64()):
+            return pc.if_else(pc.is_finite(column), column, pa.scalar(None, kind)).to_pylist()
+        if any(is_plain(kind) for is_plain in _PLAIN_TYPES):
+            return column.to_pylist()
+
+    values = features.decode_column(column.to_pylist(), name, token_per_repo_id=token_per_repo_id)
+    return [_serialize_value(value, feature) for value in values]
+
+
+def _read_row_range(dataset: pads.Dataset, columns: List[str], offset: int, limit: int) -> pa.Table:
+    """Read rows [offset, offset + limit) of an unfiltered dataset.
+
+    Row counts come from the file footers, so only the row groups overlapping
+    the page are read and decoded; earlier ones are skipped without I/O.
+    """
+    end = offset + limit
+    position = 0
+    first_start = None
+    pieces = []
+    for fragment in dataset.get_fragments():
+        metadata = fragment.metadata
+        row_group_ids = []
+        for i in range(metadata.num_row_groups):
+            num_rows = metadata.row_group(i).num_rows
+            if position + num_rows > offset and position < end:
+                if first_start is None:
+                    first_start = position
+                row_group_ids.append(i)
+            position += num_rows
+        if row_group_ids:
+            pieces.append(
+                fragment.subset(row_group_ids=row_group_ids).to_table(schema=dataset.schema, columns=columns)
+            )
+        if position >= end:
+            break
+
+    if not pieces:
+        return dataset.schema.empty_table().select(columns)
+    return pa.concat_tables(pieces).slice(offset - first_start, limit)
+
+
+def _read_parquet_rows(
+    builder: Any,
+    repo_id: str,
+    split: str,
+    offset: int,
+    limit: int,
+    token: Optional[str],
+    where: Optional[str],
+    mask_columns: Optional[List[str]],
+) -> Optional[List[Dict[str, Any]]]:
+    """Read a page of rows straight from a Parquet-backed dataset's files.
+
+    The filter is pushed into the Arrow scanner (row groups are skipped by
+    their min/max statistics), unfiltered pages skip straight to the row
+    groups that hold them, masked columns are never read, and only the
+    requested page is decoded, column by column. Returns None when the dataset isn't plain
+    Parquet or the filter can't be expressed, so the caller can stream.
+    """
+    parquet_files = _parquet_data_files(builder, split, token)
+    if parquet_files is None:
+        return None
+
+    expression = None
+    if where:
+        expression = _where_to_expression(where)
+        if expression is None:
+            return None
+
+    fs, paths = parquet_files
+    dataset = pads.dataset(paths, format="parquet", filesystem=fs)
+
+    masked = set(mask_columns or ())
+    column_names = dataset.schema.names
+    columns = [name for name in column_names if name not in masked]
+    if expression is None:
+        table = _read_row_range(dataset, columns, offset, limit)
+    else:
+        table = dataset.scanner(columns=columns, filter=expression).head(offset + limit).slice(offset, limit)
+
+    datasets = lazy_datasets()
+    features = builder.info.features or datasets.Features.from_arrow_schema(dataset.schema)
+    token_per_repo_id = {repo_id: token} if token else None
+
+    serialized = [
+        ["[MASKED]"] * table.num_rows if name in masked
+        else _serialize_column(table.column(name), name, features, token_per_repo_id)
+        for name in column_names
+    ]
+    return [dict(zip(column_names, values)) for values in zip(*serialized)]
+
+
 def get_dataset_rows(
     namespace: str, 
     repo: str, 
@@ -89,44 +412,76 @@ def get_dataset_rows(
 ) -> DatasetRowResponse:
     """
     Stream rows from the dataset.
+
+    Parquet-backed datasets are read directly with filter pushdown; anything
+    else (or a filter Arrow can't express) is streamed row by row. Unfiltered
+    pages are cached briefly so paging back and forth doesn't re-read them.
+
+    Raises WhereFilterError if `where` is not a valid filter expression.
     """
+    if where:
+        _compile_where(where)
+
+    key = None
+    if where is None:
+        key = (namespace, repo, config, split, offset, limit, ref, _token_key(token), tuple(mask_columns or ()))
+        with _CACHE_LOCK:
+            cached_rows = _ROWS_CACHE.get(key)
+        if cached_rows is not None:
+            return cached_rows
+
+    result = _load_dataset_rows(namespace, repo, config, split, offset, limit, ref, token, where, mask_columns)
+    if key is not None and result.error is None:
+        with _CACHE_LOCK:
+            _ROWS_CACHE[key] = result
+    return result
+
+
+def _load_dataset_rows(
+    namespace: str,
+    repo: str,
+    config: str,
+    split: str,
+    offset: int,
+    limit: int,
+    ref: str,
+    token: Optional[str],
+    where: Optional[str],
+    mask_columns: Optional[List[str]],
+) -> DatasetRowResponse:
     repo_id = f"{namespace}/{repo}"
     
     try:
+        builder = _dataset_builder(repo_id, config if config != "default" else None, ref, token)
+
+        try:
+            rows = _read_parquet_rows(builder, repo_id, split, offset, limit, token, where, mask_columns)
+        except Exception as e:
+            logger.debug(f"Parquet read failed for {repo_id}, streaming instead: {e}")
+            rows = None
+        if rows is not None:
+            return DatasetRowResponse(
+                rows=rows,
+                offset=offset,
+                limit=limit,
+                split=split,
+                config=config
+            )
+
         # Load dataset in streaming mode
-        ds = load_dataset(
-            repo_id, 
-            name=config if config != "default" else None, 
-            split=split, 
-            streaming=True, 
-            token=token, 
-            trust_remote_code=True,
-            revision=ref
-        )
+        ds = builder.as_streaming_dataset(split=split)
         
-        # Apply filter if provided
+        # Apply filter if provided; evaluated per row from the pre-compiled,
+        # validated bytecode with no builtins available (see _where_matches)
         if where:
-            try:
-                # Restrict globals for safety
-                safe_globals = {"__builtins__": {}}
-                ds = ds.filter(lambda x: eval(where, safe_globals, x))
-            except Exception as e:
-                logger.warning(f"Filter error in {repo_id}: {e}")
-                return DatasetRowResponse(
-                    rows=[], offset=offset, limit=limit, split=split, config=config,
-                    error=f"Filter error: {e}"
-                )
+            code = _compile_where(where)[1]
+            ds = ds.filter(lambda x: _where_matches(code, x))
         
         rows = []
         features = ds.features
         
-        # We must iterate for offset
-        for i, sample in enumerate(ds):
-            if i < offset:
-                continue
-            if len(rows) >= limit:
-                break
-            
+        # Streams can't seek; skip() discards leading rows before serialization
+        for sample in ds.skip(offset).take(limit):
             serialized_sample = {}
             for k, v in sample.items():
                 if mask_columns and k in mask_columns:
@@ -152,93 +507,153 @@ def get_dataset_rows(
         )
 
 
-def _serialize_value(value: Any, feature: Any = None) -> Any:
-    """Serialize values for JSON response."""
-    if value is None:
-        return None
+def get_dataset_preview(
+    namespace: str,
+    repo: str,
+    config: Optional[str] = None,
+    split: str = "train",
+    limit: int = 100,
+    ref: str = "main",
+    token: Optional[str] = None,
+) -> DatasetPreviewResponse:
+    """
+    Dataset info plus the first rows of one split, for the initial viewer page.
+    """
+    info = get_dataset_info(namespace, repo, ref=ref, token=token)
+
+    # Without an explicit config, preview the first one the dataset actually has
+    if config is None:
+        config = info.configs[0] if info.configs else "default"
 
+    rows = get_dataset_rows(
+        namespace, repo, config=config, split=split, limit=limit, ref=ref, token=token
+    )
+    return DatasetPreviewResponse(info=info, rows=rows)
+
+
+def _serialize_float(value: float) -> Optional[float]:
     # Handle NaN / Inf for JSON safety
-    if isinstance(value, float):
-        if np.isnan(value) or np.isinf(value):
-            return None
-    
+    if np.isnan(value) or np.isinf(value):
+        return None
+    return value
+
+
+def _serialize_image(value: Image.Image) -> str:
+    try:
+        # Check dimensions for safety
+        if value.width * value.height > 10000 * 10000:
+            return "<Image Too Large>"
+
+        fmt = value.format or "PNG"
+        # Skip encoding outright when even the best compression can't fit
+        raw_size = value.width * value.height * len(value.getbands())
+        if raw_size > MAX_IMG_SIZE_BYTES * _MAX_COMPRESSION_RATIO.get(fmt, _DEFAULT_COMPRESSION_RATIO):
+            return "<Image Exceeds Inline Limit>"
+
+        buffered = io.BytesIO()
+        if fmt == "JPEG":
+            value.save(buffered, format=fmt, quality=85, optimize=False)
+        else:
+            value.save(buffered, format=fmt)
+
+        if buffered.tell() > MAX_IMG_SIZE_BYTES:
+            return "<Image Exceeds Inline Limit>"
+
+        img_str = base64.b64encode(buffered.getbuffer()).decode("utf-8")
+        return f"data:image/{fmt.lower()};base64,{img_str}"
+    except Exception as e:
+        logger.warning(f"Image serialization failed: {e}")
+        return f"<Image Error: {type(e).__name__}>"
+
+
+def _serialize_audio(value: Dict[str, Any]) -> Any:
+    if "array" not in value or "sampling_rate" not in value:
+        return value
+    try:
+        ary = value["array"]
+        sr = value["sampling_rate"]
+
+        if not isinstance(ary, np.ndarray):
+            ary = np.array(ary)
+
+        duration = len(ary) / sr if sr > 0 else 0
+        if duration > MAX_AUDIO_DURATION_SEC:
+            return {"error": "Audio too long for inline preview", "duration": duration}
+
+        # Normalize and convert to wav; clip and scale share one buffer
+        if ary.dtype.kind == 'f':
+            scaled = np.clip(ary, -1.0, 1.0)
+            np.multiply(scaled, 32767, out=scaled)
+            ary = scaled.astype(np.int16)
+        # Frames are written straight from the array's memory, which must be
+        # C-ordered (samples, channels) to interleave correctly
+        ary = np.ascontiguousarray(ary)
+
+        buffered = io.BytesIO()
+        with wave.open(buffered, 'wb') as wav_file:
+            wav_file.setnchannels(ary.shape[1] if len(ary.shape) > 1 else 1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sr)
+            wav_file.writeframes(memoryview(ary).cast("B"))
+
+        wav_str = base64.b64encode(buffered.getbuffer()).decode("utf-8")
+        return {
+            "src": f"data:audio/wav;base64,{wav_str}",
+            "sampling_rate": sr,
+            "duration": duration
+        }
+    except Exception as e:
+        logger.warning(f"Audio serialization failed: {e}")
+        return f"<Audio Error: {type(e).__name__}>"
+
+
+def _serialize_array(value: Any) -> Any:
+    # Limit array size for JSON serialization
+    if value.size > 1000:
+        return f"<Array size {value.size} suppressed>"
+    return value.tolist()
+
+
+def _serialize_numpy_float(value: np.floating) -> Optional[float]:
+    return _serialize_float(value.item())
+
+
+# Serializers by value type. Exact types hit in one dict lookup; subclasses
+# (PIL's PngImageFile, numpy scalars, pandas Timestamps) are resolved once
+# through their MRO and remembered, so the per-cell cost stays a lookup.
+_SERIALIZERS: Dict[type, Any] = {
+    type(None): lambda value: None,
+    float: _serialize_float,
+    Image.Image: _serialize_image,
+    dict: _serialize_audio,
+    np.ndarray: _serialize_array,
+    np.floating: _serialize_numpy_float,
+    np.generic: _serialize_array,
+    datetime.date: lambda value: value.isoformat(),
+    bytes: lambda value: f"<Binary data: {len(value)} bytes>",
+}
+
+
+def _serializer_for(cls: type) -> Any:
+    """Find the serializer for a value type, caching what subclasses resolve to."""
+    try:
+        return _SERIALIZERS[cls]
+    except KeyError:
+        pass
+    serializer = next((_SERIALIZERS[base] for base in cls.__mro__ if base in _SERIALIZERS), None)
+    _SERIALIZERS[cls] = serializer
+    return serializer
+
+
+def _serialize_value(value: Any, feature: Any = None) -> Any:
+    """Serialize values for JSON response."""
     # Handle ClassLabel
-    if feature and isinstance(feature, datasets.ClassLabel):
+    if isinstance(value, int) and feature and isinstance(feature, lazy_datasets().ClassLabel):
         try:
-             if isinstance(value, int):
-                 return feature.int2str(value)
+            return feature.int2str(value)
         except Exception:
-             pass
-    
-    # Handle PIL Image
-    if isinstance(value, Image.Image):
-        try:
-            # Check dimensions for safety
-            if value.width * value.height > 10000 * 10000:
-                return "<Image Too Large>"
-                
-            buffered = io.BytesIO()
-            fmt = value.format or "PNG"
-            value.save(buffered, format=fmt)
-            
-            data_bytes = buffered.getvalue()
-            if len(data_bytes) > MAX_IMG_SIZE_BYTES:
-                return "<Image Exceeds Inline Limit>"
-                
-            img_str = base64.b64encode(data_bytes).decode("utf-8")
-            return f"data:image/{fmt.lower()};base64,{img_str}"
-        except Exception as e:
-            logger.warning(f"Image serialization failed: {e}")
-            return f"<Image Error: {type(e).__name__}>"
+            pass
 
-    # Handle Audio
-    if isinstance(value, dict) and "array" in value and "sampling_rate" in value:
-        try:
-            ary = value["array"]
-            sr = value["sampling_rate"]
-            
-            if not isinstance(ary, np.ndarray):
-                ary = np.array(ary)
-                
-            duration = len(ary) / sr if sr > 0 else 0
-            if duration > MAX_AUDIO_DURATION_SEC:
-                return {"error": "Audio too long for inline preview", "duration": duration}
-
-            # Normalize and convert to wav
-            if ary.dtype.kind == 'f':
-                ary = np.clip(ary, -1.0, 1.0)
-                ary = (ary * 32767).astype(np.int16)
-            
-            buffered = io.BytesIO()
-            import wave
-            with wave.open(buffered, 'wb') as wav_file:
-                wav_file.setnchannels(ary.shape[1] if len(ary.shape) > 1 else 1)
-                wav_file.setsampwidth(2)
-                wav_file.setframerate(sr)
-                wav_file.writeframes(ary.tobytes())
-                
-            wav_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
-            return {
-                "src": f"data:audio/wav;base64,{wav_str}",
-                "sampling_rate": sr,
-                "duration": duration
-            }
-        except Exception as e:
-             logger.warning(f"Audio serialization failed: {e}")
-             return f"<Audio Error: {type(e).__name__}>"
-
-    # Generic types
-    if isinstance(value, (np.ndarray, np.generic)):
-        # Limit array size for JSON serialization
-        if value.size > 1000:
-            return f"<Array size {value.size} suppressed>"
-        return value.tolist()
-        
-    if isinstance(value, (datetime.datetime, datetime.date)):
-        return value.isoformat()
-        
-    if isinstance(value, bytes):
-        return f"<Binary data: {len(value)} bytes>"
-        
-    return value
+    serializer = _serializer_for(type(value))
+    return serializer(value) if serializer else value
 
@@ -1,9 +1,12 @@
-import json
 import asyncio
-from typing import List, Optional
+import itertools
+from collections import deque
+from typing import List, Optional, Tuple
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.responses import StreamingResponse
+import orjson
+from peewee import JOIN, fn
 from pydantic import BaseModel
 
 from kohakuhub.db import Discussion, Comment, Repository, User, db
@@ -15,13 +18,50 @@ from kohakuhub.logger import get_logger
 logger = get_logger("Discussions")
 router = APIRouter(prefix="/discussions", tags=["Discussions"])
 
-# SSE event bus
-_EVENT_QUEUES: List[asyncio.Queue] = []
+# SSE event bus: one bounded log of (seq, event) that every subscriber reads
+# with its own cursor, so an event is stored once however many are listening
+_EVENT_LOG: deque = deque(maxlen=1024)
+_NEW_EVENT = asyncio.Event()
 
-async def broadcast_event(event_type: str, data: dict):
-    event = json.dumps({"type": event_type, "data": data})
-    for q in _EVENT_QUEUES:
-        await q.put(event)
+# Handlers only enqueue; one dispatcher task per event loop encodes and logs
+# events in batches. The queue is bounded so a burst can't grow memory.
+_EVENT_BACKLOG = 10_000
+_EVENT_BATCH = 64
+_DISPATCHER: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Queue, asyncio.Task]] = None
+
+def broadcast_event(event_type: str, data: dict) -> None:
+    """Queue an event for SSE subscribers without blocking the caller."""
+    global _DISPATCHER
+    loop = asyncio.get_running_loop()
+    if _DISPATCHER is None or _DISPATCHER[0] is not loop:
+        queue = asyncio.Queue(maxsize=_EVENT_BACKLOG)
+        _DISPATCHER = (loop, queue, loop.create_task(_dispatch_events(queue)))
+    try:
+        _DISPATCHER[1].put_nowait((event_type, data))
+    except asyncio.QueueFull:
+        logger.warning(f"Dropping {event_type} event: dispatch queue is full")
+
+async def _dispatch_events(queue: asyncio.Queue):
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < _EVENT_BATCH and not queue.empty():
+            batch.append(queue.get_nowait())
+
+        seq = _EVENT_LOG[-1][0] if _EVENT_LOG else 0
+        for event_type, data in batch:
+            seq += 1
+            _EVENT_LOG.append((seq, orjson.dumps({"type": event_type, "data": data}).decode()))
+        # Wake everyone currently waiting once per batch; later waiters block
+        # until the next one
+        _NEW_EVENT.set()
+        _NEW_EVENT.clear()
+
+def _events_after(cursor: int) -> List[tuple]:
+    """Logged (seq, event) pairs newer than cursor; older ones may have rotated out."""
+    if not _EVENT_LOG:
+        return []
+    start = max(0, cursor + 1 - _EVENT_LOG[0][0])
+    return list(itertools.islice(_EVENT_LOG, start, None))
 
 class DiscussionCreate(BaseModel):
     title: str
@@ -54,7 +94,7 @@ async def create_discussion(
             content=data.comment
         )
     
-    asyncio.create_task(broadcast_event("new_discussion", {"repo_id": repo.full_id, "discussion_id": discussion.id}))
+    broadcast_event("new_discussion", {"repo_id": repo.full_id, "discussion_id": discussion.id})
     return {"id": discussion.id}
 
 @router.get("/{repo_type}/{namespace}/{name}")
@@ -63,42 +103,55 @@ async def list_discussions(repo_type: str, namespace: str, name: str):
     if not repo:
         raise HTTPException(status_code=404, detail="Repository not found")
     
-    discussions = (Discussion.select()
+    # Authors and comment counts come from one aggregate query, not one per row
+    discussions = (Discussion.select(
+                       Discussion.id,
+                       Discussion.title,
+                       User.username.alias("author"),
+                       Discussion.status,
+                       Discussion.created_at,
+                       fn.COUNT(Comment.id).alias("comment_count"),
+                   )
+                   .join(User, on=(Discussion.author == User.id))
+                   .switch(Discussion)
+                   .join(Comment, JOIN.LEFT_OUTER, on=(Comment.discussion == Discussion.id))
                    .where(Discussion.repository == repo)
-                   .order_by(Discussion.created_at.desc()))
+                   .group_by(Discussion.id, User.username)
+                   .order_by(Discussion.created_at.desc())
+                   .dicts())
     
-    return [
-        {
-            "id": d.id,
-            "title": d.title,
-            "author": d.author.username,
-            "status": d.status,
-            "created_at": d.created_at,
-            "comment_count": d.comments.count()
-        } for d in discussions
-    ]
+    return list(discussions)
 
 @router.get("/thread/{discussion_id}")
 async def get_discussion(discussion_id: int):
-    d = Discussion.get_or_none(Discussion.id == discussion_id)
+    # Author names are joined in, so the thread takes two queries in total
+    d = (Discussion.select(
+             Discussion.id,
+             Discussion.title,
+             User.username.alias("author"),
+             Discussion.status,
+             Discussion.created_at,
+         )
+         .join(User, on=(Discussion.author == User.id))
+         .where(Discussion.id == discussion_id)
+         .dicts()
+         .get_or_none())
     if not d:
         raise HTTPException(status_code=404, detail="Discussion not found")
     
-    return {
-        "id": d.id,
-        "title": d.title,
-        "author": d.author.username,
-        "status": d.status,
-        "created_at": d.created_at,
-        "comments": [
-            {
-                "id": c.id,
-                "author": c.author.username,
-                "content": c.content,
-                "created_at": c.created_at
-            } for c in d.comments.order_by(Comment.created_at.asc())
-        ]
-    }
+    d["comments"] = list(
+        Comment.select(
+            Comment.id,
+            User.username.alias("author"),
+            Comment.content,
+            Comment.created_at,
+        )
+        .join(User, on=(Comment.author == User.id))
+        .where(Comment.discussion == discussion_id)
+        .order_by(Comment.created_at.asc())
+        .dicts()
+    )
+    return d
 
 @router.post("/thread/{discussion_id}/comment")
 async def add_comment(
@@ -119,21 +172,23 @@ async def add_comment(
     d.updated_at = datetime.now(timezone.utc)
     d.save()
     
-    asyncio.create_task(broadcast_event("new_comment", {"discussion_id": d.id, "comment_id": comment.id}))
+    broadcast_event("new_comment", {"discussion_id": d.id, "comment_id": comment.id})
     return {"id": comment.id}
 
 @router.get("/notifications/sse")
 async def sse_notifications(request: Request):
     async def event_generator():
-        q = asyncio.Queue()
-        _EVENT_QUEUES.append(q)
-        try:
-            while True:
-                if await request.is_disconnected():
-                    break
-                event = await q.get()
+        # Only events published after subscribing are delivered
+        cursor = _EVENT_LOG[-1][0] if _EVENT_LOG else 0
+        while True:
+            if await request.is_disconnected():
+                break
+            events = _events_after(cursor)
+            if not events:
+                await _NEW_EVENT.wait()
+                continue
+            cursor = events[-1][0]
+            for _, event in events:
                 yield f"data: {event}\n\n"
-        finally:
-            _EVENT_QUEUES.remove(q)
             
     return StreamingResponse(event_generator(), media_type="text/event-stream")
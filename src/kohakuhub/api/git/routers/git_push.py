@@ -4,6 +4,7 @@ This module provides a dedicated endpoint to receive Git pushes, parse the pack
 and commit the changes to LakeFS.
 """
 
+import asyncio
 import base64
 import hashlib
 import json
@@ -54,15 +55,19 @@ async def git_push_endpoint(
     if not repo_row:
         raise HTTPException(404, detail="Repository not found")
 
-    # Read pack data
-    pack_data = await request.body()
+    # Read pack data into one growing buffer, rather than collecting chunks
+    # and joining them (which briefly holds the push twice)
+    pack_data = bytearray()
+    async for chunk in request.stream():
+        pack_data += chunk
     if not pack_data:
         raise HTTPException(400, detail="Empty pack data")
 
     try:
-        # 1. Parse pack
+        # 1. Parse pack off the event loop; inflating and hashing a large
+        # push would otherwise stall every other request on this worker
         parser = GitPackParser(pack_data)
-        objects = parser.parse()
+        objects = await asyncio.to_thread(parser.parse)
         
         lakefs_repo = lakefs_repo_name(repo_row.repo_type, repo_id)
         client = get_lakefs_client()
@@ -507,7 +507,8 @@ class GitLakeFSBridge:
         try:
             # 1. Parse pack file
             parser = GitPackParser(pack_data)
-            objects = parser.parse() # Dictionary mapping SHA-1 to (type, content)
+            # Dictionary mapping SHA-1 to (type, content), parsed off the event loop
+            objects = await asyncio.to_thread(parser.parse)
             
             # 2. Get repository for DB operations
             repo = get_repository(self.repo_type, self.namespace, self.name)
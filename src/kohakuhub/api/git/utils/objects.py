@@ -18,8 +18,9 @@ def compute_git_object_sha1(obj_type: str, content: bytes) -> str:
     Returns:
         SHA-1 hex digest
     """
-    header = f"{obj_type} {len(content)}\0".encode()
-    return hashlib.sha1(header + content).hexdigest()
+    sha1 = hashlib.sha1(f"{obj_type} {len(content)}\0".encode())
+    sha1.update(content)
+    return sha1.hexdigest()
 
 
 def create_blob_object(content: bytes) -> tuple[str, bytes]:
@@ -6,16 +6,44 @@ without any native dependencies. It supports base objects and delta compression
 """
 
 import hashlib
+import os
 import struct
+import threading
 import zlib
-from typing import BinaryIO, Dict, List, Optional, Tuple, Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Dict, List, Optional, Tuple, Any, Union
+
+# Object header prefixes ("<type> "), pre-encoded
+_OBJECT_TYPE_HEADERS = {1: b"commit ", 2: b"tree ", 3: b"blob ", 4: b"tag "}
+
+# Objects at least this large are hashed on the pool; below it the hand-off
+# costs more than hashing inline
+_PARALLEL_HASH_MIN_SIZE = 64 * 1024
+
+_HASH_POOL: Optional[ThreadPoolExecutor] = None
+_HASH_POOL_LOCK = threading.Lock()
+
+
+def _hash_pool() -> ThreadPoolExecutor:
+    """Process-wide pool for object hashing, created on first use."""
+    global _HASH_POOL
+    if _HASH_POOL is None:
+        with _HASH_POOL_LOCK:
+            if _HASH_POOL is None:
+                _HASH_POOL = ThreadPoolExecutor(
+                    max_workers=min(8, os.cpu_count() or 1),
+                    thread_name_prefix="pack-sha1",
+                )
+    return _HASH_POOL
 
 
 class GitPackParser:
     """Parser for Git pack files (v2)."""
 
-    def __init__(self, pack_data: bytes):
+    def __init__(self, pack_data: bytes, verify_checksum: bool = False):
         self.data = pack_data
+        self.view = memoryview(pack_data)
+        self.verify_checksum = verify_checksum
         self.offset = 0
         self.objects = {}  # sha1 -> (type, content)
         self.offsets = {} # offset -> (type, content)
@@ -23,9 +51,21 @@ class GitPackParser:
     def parse(self) -> Dict[str, Tuple[int, bytes]]:
         """Parse the pack file and return objects.
 
+        Objects have to be inflated in pack order, since only inflating one
+        reveals where the next begins. Their SHA-1s don't: large objects are
+        hashed on a thread pool (hashlib and zlib both release the GIL) while
+        parsing moves on, and collected before a REF_DELTA needs them.
+
+        With verify_checksum, the trailing pack SHA-1 is computed on the pool
+        alongside the parse and checked at the end; otherwise it's skipped.
+
         Returns:
             Dictionary mapping SHA-1 hex to (object_type, content)
         """
+        checksum = None
+        if self.verify_checksum:
+            checksum = _hash_pool().submit(lambda: hashlib.sha1(self.view[:-20]).digest())
+
         # 1. Parse Header
         signature = self.data[self.offset : self.offset + 4]
         if signature != b"PACK":
@@ -41,6 +81,7 @@ class GitPackParser:
         self.offset += 4
 
         # 2. Parse Objects
+        pending: List[Tuple[Union[str, Future], int, bytes]] = []
         for _ in range(num_objects):
             obj_offset = self.offset
             obj_type, obj_size, data_start = self._read_type_and_size()
@@ -50,77 +91,107 @@ class GitPackParser:
                 # Base object
                 content = self._read_base_object(obj_size)
             elif obj_type == 6:
-                # OFS_DELTA
-                content = self._read_ofs_delta(obj_size, obj_offset)
+                # OFS_DELTA; the result has its base's type
+                obj_type, content = self._read_ofs_delta(obj_size, obj_offset)
             elif obj_type == 7:
-                # REF_DELTA
-                content = self._read_ref_delta(obj_size)
+                # REF_DELTA, whose base is looked up by SHA-1
+                self._collect_hashes(pending)
+                obj_type, content = self._read_ref_delta(obj_size)
             else:
                 raise ValueError(f"Unknown object type: {obj_type}")
 
             # Compute SHA-1 and store
-            obj_sha1 = self._compute_sha1(obj_type, content)
-            self.objects[obj_sha1] = (obj_type, content)
+            if len(content) >= _PARALLEL_HASH_MIN_SIZE:
+                obj_sha1 = _hash_pool().submit(self._compute_sha1, obj_type, content)
+            else:
+                obj_sha1 = self._compute_sha1(obj_type, content)
+            pending.append((obj_sha1, obj_type, content))
             self.offsets[obj_offset] = (obj_type, content)
+        self._collect_hashes(pending)
 
         # 3. Verify Checksum (optional but good)
-        actual_checksum = hashlib.sha1(self.data[: self.offset]).digest()
-        expected_checksum = self.data[self.offset : self.offset + 20]
-        # if actual_checksum != expected_checksum:
-        #    raise ValueError("Pack checksum mismatch")
+        if checksum is not None:
+            if self.offset != len(self.data) - 20 or checksum.result() != self.data[self.offset :]:
+                raise ValueError("Pack checksum mismatch")
 
         return self.objects
 
+    def _collect_hashes(self, pending: List[Tuple[Union[str, Future], int, bytes]]) -> None:
+        """Store pending objects by SHA-1, in pack order, once their hashes are in."""
+        for obj_sha1, obj_type, content in pending:
+            if isinstance(obj_sha1, Future):
+                obj_sha1 = obj_sha1.result()
+            self.objects[obj_sha1] = (obj_type, content)
+        pending.clear()
+
     def _read_type_and_size(self) -> Tuple[int, int, int]:
         """Read object type and size from variable-length encoding."""
-        byte = self.data[self.offset]
-        self.offset += 1
-        
+        # Locals rather than attribute round trips per byte; written back once
+        data = self.data
+        offset = self.offset
+        byte = data[offset]
+        offset += 1
+
         obj_type = (byte >> 4) & 7
         size = byte & 15
         shift = 4
-        
+
         while byte & 128:
-            byte = self.data[self.offset]
-            self.offset += 1
+            byte = data[offset]
+            offset += 1
             size += (byte & 127) << shift
             shift += 7
-            
-        return obj_type, size, self.offset
+
+        self.offset = offset
+        return obj_type, size, offset
 
     def _read_base_object(self, size: int) -> bytes:
-        """Read and decompress base object."""
+        """Read and decompress base object.
+
+        The stream is fed from a zero-copy view bounded by the largest deflate
+        output zlib can produce for `size` bytes, so neither the input slice
+        nor the leftover `unused_data` copies the rest of the pack per object.
+        Streams from less thrifty encoders get the remainder as a fallback.
+        """
         decompressor = zlib.decompressobj()
-        content = decompressor.decompress(self.data[self.offset :])
-        self.offset += len(self.data[self.offset :]) - len(decompressor.unused_data)
-        
+        bound = size + (size >> 12) + (size >> 14) + (size >> 25) + 13
+        end = min(len(self.data), self.offset + bound)
+        content = decompressor.decompress(self.view[self.offset : end])
+        if not decompressor.eof and end < len(self.data):
+            content += decompressor.decompress(self.view[end:])
+            end = len(self.data)
+        self.offset = end - len(decompressor.unused_data)
+
         if len(content) != size:
             raise ValueError(f"Decompressed size mismatch: expected {size}, got {len(content)}")
             
         return content
 
-    def _read_ofs_delta(self, size: int, obj_offset: int) -> bytes:
-        """Read and apply offset-based delta."""
+    def _read_ofs_delta(self, size: int, obj_offset: int) -> Tuple[int, bytes]:
+        """Read and apply offset-based delta, returning the base's type and the result."""
         # Read offset encoding
-        byte = self.data[self.offset]
-        self.offset += 1
+        data = self.data
+        offset = self.offset
+        byte = data[offset]
+        offset += 1
         rel_offset = byte & 127
         while byte & 128:
-            byte = self.data[self.offset]
-            self.offset += 1
+            byte = data[offset]
+            offset += 1
             rel_offset = ((rel_offset + 1) << 7) | (byte & 127)
-            
+        self.offset = offset
+
         base_offset = obj_offset - rel_offset
         base_type, base_content = self.offsets[base_offset]
         
         # Read delta data
         delta_data = self._read_base_object(size) # Compressed delta
         
-        return self._apply_delta(base_content, delta_data)
+        return base_type, self._apply_delta(base_content, delta_data)
 
-    def _read_ref_delta(self, size: int) -> bytes:
-        """Read and apply SHA1-based delta."""
-        base_sha1 = self.data[self.offset : self.offset + 20].hex()
+    def _read_ref_delta(self, size: int) -> Tuple[int, bytes]:
+        """Read and apply SHA1-based delta, returning the base's type and the result."""
+        base_sha1 = self.view[self.offset : self.offset + 20].hex()
         self.offset += 20
         
         if base_sha1 not in self.objects:
@@ -131,66 +202,85 @@ class GitPackParser:
         base_type, base_content = self.objects[base_sha1]
         delta_data = self._read_base_object(size)
         
-        return self._apply_delta(base_content, delta_data)
+        return base_type, self._apply_delta(base_content, delta_data)
 
     def _apply_delta(self, base_content: bytes, delta_data: bytes) -> bytes:
-        """Apply delta instructions to base content."""
-        def read_var_int(data, pos):
-            result = 0
+        """Apply delta instructions to base content.
+
+        The result is preallocated from the delta header and filled in place,
+        so each instruction is one slice assignment instead of a resize.
+        """
+        delta_len = len(delta_data)
+
+        # Source and target sizes, as little-endian base-128 varints
+        pos = 0
+        header = []
+        for _ in range(2):
+            value = 0
             shift = 0
             while True:
-                byte = data[pos]
+                byte = delta_data[pos]
                 pos += 1
-                result |= (byte & 127) << shift
+                value |= (byte & 127) << shift
                 if not (byte & 128):
-                    return result, pos
+                    break
                 shift += 7
+            header.append(value)
+        src_size, dst_size = header
 
-        pos = 0
-        src_size, pos = read_var_int(delta_data, pos)
-        dst_size, pos = read_var_int(delta_data, pos)
-        
         if src_size != len(base_content):
             raise ValueError(f"Delta source size mismatch: {src_size} vs {len(base_content)}")
-            
-        result = bytearray()
-        while pos < len(delta_data):
+
+        # Copy instructions read straight from views, not intermediate slices
+        base_view = memoryview(base_content)
+        delta_view = memoryview(delta_data)
+        result = bytearray(dst_size)
+        out = 0
+        while pos < delta_len:
             opcode = delta_data[pos]
             pos += 1
-            
+
             if opcode & 128:
                 # Copy from base
                 offset = 0
                 size = 0
-                
+
                 # Build offset
                 if opcode & 0x01: offset |= delta_data[pos]; pos += 1
                 if opcode & 0x02: offset |= delta_data[pos] << 8; pos += 1
                 if opcode & 0x04: offset |= delta_data[pos] << 16; pos += 1
                 if opcode & 0x08: offset |= delta_data[pos] << 24; pos += 1
-                
+
                 # Build size
                 if opcode & 0x10: size |= delta_data[pos]; pos += 1
                 if opcode & 0x20: size |= delta_data[pos] << 8; pos += 1
                 if opcode & 0x40: size |= delta_data[pos] << 16; pos += 1
-                
+
                 if size == 0: size = 0x10000
-                
-                result.extend(base_content[offset : offset + size])
+
+                chunk = base_view[offset : offset + size]
             elif opcode > 0:
                 # Copy from delta (add data)
-                result.extend(delta_data[pos : pos + opcode])
+                chunk = delta_view[pos : pos + opcode]
                 pos += opcode
             else:
                 raise ValueError("Invalid delta opcode 0")
-                
-        if len(result) != dst_size:
-            raise ValueError(f"Delta result size mismatch: {len(result)} vs {dst_size}")
-            
+
+            end = out + len(chunk)
+            if end > dst_size:
+                raise ValueError(f"Delta result size mismatch: {end} vs {dst_size}")
+            result[out:end] = chunk
+            out = end
+
+        if out != dst_size:
+            raise ValueError(f"Delta result size mismatch: {out} vs {dst_size}")
+
         return bytes(result)
 
     def _compute_sha1(self, obj_type: int, content: bytes) -> str:
         """Compute Git SHA-1 for an object."""
-        type_str = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}.get(obj_type, "blob")
-        header = f"{type_str} {len(content)}\0".encode()
-        return hashlib.sha1(header + content).hexdigest()
+        prefix = _OBJECT_TYPE_HEADERS.get(obj_type, b"blob ")
+        # Header and content are fed separately so large blobs aren't copied
+        sha1 = hashlib.sha1(prefix + b"%d\0" % len(content))
+        sha1.update(content)
+        return sha1.hexdigest()
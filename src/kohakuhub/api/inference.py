@@ -1,12 +1,13 @@
+import asyncio
 import os
+import threading
 import time
-from typing import Any, Dict, Optional
-import torch
-import gradio as gr
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+import httpx
+import orjson
+from cachetools import LRUCache
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
-from transformers import pipeline, AutoConfig
-from accelerate import infer_auto_device_map, init_empty_weights
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
@@ -14,7 +15,13 @@ from kohakuhub.config import cfg
 from kohakuhub.logger import get_logger
 from kohakuhub.auth.dependencies import get_optional_user
 from kohakuhub.auth.permissions import check_repo_read_permission
-from kohakuhub.db_operations import get_repository
+from kohakuhub.db_operations import get_repository_cached
+
+# torch, transformers, accelerate and gradio are imported where they're used:
+# together they add seconds and gigabytes to every worker that imports this
+# module, whether or not it ever serves a model
+if TYPE_CHECKING:
+    import torch
 
 logger = get_logger("Inference")
 router = APIRouter(prefix="/inference", tags=["Inference"])
@@ -25,15 +32,60 @@ class InferenceRequest(BaseModel):
     parameters: Optional[Dict[str, Any]] = None
     token: Optional[str] = None # User's HF token for fallback
 
+# Most pipelines a worker keeps loaded; the least recently used is dropped
+_MAX_LOADED_PIPELINES = 4
+
+
+class _PipelineCache(LRUCache):
+    """LRU of loaded pipelines that hands evicted weights' memory back."""
+
+    def popitem(self):
+        key, pipe = super().popitem()
+        logger.info(f"Evicting pipeline {key}")
+        del pipe
+        import torch
+
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        return key, None
+
+
 # Global model cache to avoid reloading
-_MODEL_CACHE = {}
+_MODEL_CACHE = _PipelineCache(maxsize=_MAX_LOADED_PIPELINES)
+_MODEL_CACHE_LOCK = threading.Lock()
+# One lock per model, so concurrent first requests load it only once
+_LOAD_LOCKS: Dict[str, threading.Lock] = {}
+
 
 def get_pipeline(repo_id: str, revision: str = "main"):
-    """Loads or retrieves a pipeline with auto device mapping."""
+    """Loads or retrieves a pipeline with auto device mapping.
+
+    Blocks for the whole load on a miss; call it off the event loop.
+    """
     cache_key = f"{repo_id}:{revision}"
-    if cache_key in _MODEL_CACHE:
-        return _MODEL_CACHE[cache_key]
-    
+    with _MODEL_CACHE_LOCK:
+        pipe = _MODEL_CACHE.get(cache_key)
+        if pipe is not None:
+            return pipe
+        load_lock = _LOAD_LOCKS.setdefault(cache_key, threading.Lock())
+
+    with load_lock:
+        with _MODEL_CACHE_LOCK:
+            pipe = _MODEL_CACHE.get(cache_key)
+        if pipe is not None:
+            return pipe
+        pipe = _load_pipeline(repo_id, revision)
+        with _MODEL_CACHE_LOCK:
+            if pipe is not None:
+                _MODEL_CACHE[cache_key] = pipe
+            _LOAD_LOCKS.pop(cache_key, None)
+        return pipe
+
+
+def _load_pipeline(repo_id: str, revision: str):
+    from accelerate import init_empty_weights
+    from transformers import AutoConfig, pipeline
+
     try:
         # 1. Use accelerate to handle device mapping
         config = AutoConfig.from_pretrained(repo_id, revision=revision)
@@ -45,13 +97,134 @@ def get_pipeline(repo_id: str, revision: str = "main"):
         # 2. Simplified pipeline loading with device_map="auto"
         # This handles CPU/GPU allocation automatically via accelerate
         pipe = pipeline(model=repo_id, revision=revision, device_map="auto")
-        
-        _MODEL_CACHE[cache_key] = pipe
+        if cfg.app.inference_quantize:
+            pipe.model = _quantize_model(pipe.model, pipe.device)
         return pipe
     except Exception as e:
         logger.error(f"Failed to load pipeline for {repo_id}: {e}")
         return None
 
+def _quantize_model(model: "torch.nn.Module", device: "torch.device") -> "torch.nn.Module":
+    """Int8 dynamic quantization on CPU, bfloat16 on GPUs with native support.
+
+    Anything else (older GPUs, other accelerators) keeps its loaded dtype.
+    """
+    import torch
+
+    if device.type == "cpu":
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if device.type == "cuda" and torch.cuda.is_bf16_supported():
+        return model.to(dtype=torch.bfloat16)
+    return model
+
+
+# Dynamic batching: concurrent single-text requests to the same model with the
+# same parameters share one forward pass of up to _MAX_BATCH inputs, gathered
+# for at most _MAX_BATCH_WAIT seconds after the first arrives
+_MAX_BATCH = 8
+_MAX_BATCH_WAIT = 0.01
+# Tasks whose batched output for one input matches a single call's output
+# (up to the list wrapping _unbatch restores)
+_BATCHABLE_TASKS = {
+    "fill-mask",
+    "summarization",
+    "text-classification",
+    "text-generation",
+    "text2text-generation",
+    "token-classification",
+    "translation",
+}
+_BATCH_QUEUES: Dict[Tuple[str, bytes], asyncio.Queue] = {}
+
+# Shared client for the HF Inference API fallback, keeping connections warm
+_HF_CLIENT = httpx.AsyncClient(
+    timeout=30.0, limits=httpx.Limits(max_keepalive_connections=32)
+)
+
+
+def _is_batchable(pipe: Any, inputs: Any) -> bool:
+    task = getattr(pipe, "task", None)
+    if not isinstance(inputs, str) or not isinstance(task, str):
+        return False
+    return task in _BATCHABLE_TASKS or task.startswith("translation_")
+
+
+def _unbatch(result: Any) -> Any:
+    # A single-text call wraps per-input dicts in a list; batched calls don't
+    return result if isinstance(result, list) else [result]
+
+
+async def _infer_batched(pipe: Any, cache_key: str, inputs: str, parameters: Dict[str, Any]) -> Any:
+    """Queue one input for the model's batcher and wait for its result."""
+    batch_key = (cache_key, orjson.dumps(parameters, option=orjson.OPT_SORT_KEYS))
+    queue = _BATCH_QUEUES.get(batch_key)
+    if queue is None:
+        queue = _BATCH_QUEUES[batch_key] = asyncio.Queue()
+        asyncio.create_task(_run_batches(batch_key, queue, pipe, parameters))
+    future = asyncio.get_running_loop().create_future()
+    queue.put_nowait((inputs, future))
+    return await future
+
+
+async def _run_batches(
+    batch_key: Tuple[str, bytes], queue: asyncio.Queue, pipe: Any, parameters: Dict[str, Any]
+) -> None:
+    """Drain a batch queue, one forward pass per batch, until it runs dry."""
+    loop = asyncio.get_running_loop()
+    while not queue.empty():
+        batch: List[Tuple[str, asyncio.Future]] = [queue.get_nowait()]
+        deadline = loop.time() + _MAX_BATCH_WAIT
+        while len(batch) < _MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        inputs = [text for text, _ in batch]
+        if len(inputs) == 1:
+            # Pipelines squeeze a one-element list (fill-mask returns its bare
+            # predictions), so a lone input is run exactly as unbatched
+            try:
+                results = [await asyncio.to_thread(pipe, inputs[0], **parameters)]
+            except Exception as e:
+                results = [e]
+        else:
+            results = await _infer_batch(pipe, inputs, parameters)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    # No await since the emptiness check, so nothing can have been queued
+    del _BATCH_QUEUES[batch_key]
+
+
+async def _infer_batch(pipe: Any, inputs: List[str], parameters: Dict[str, Any]) -> List[Any]:
+    """One forward pass over several inputs; per-input results or exceptions."""
+    try:
+        results = await asyncio.to_thread(
+            pipe, inputs, **{"batch_size": len(inputs), **parameters}
+        )
+        return [_unbatch(result) for result in results]
+    except Exception as e:
+        # Some models can't batch (e.g. no pad token); run those one by one
+        logger.debug(f"Batched inference failed, running inputs singly: {e}")
+    results = []
+    for text in inputs:
+        try:
+            results.append(await asyncio.to_thread(pipe, text, **parameters))
+        except Exception as single_error:
+            results.append(single_error)
+    return results
+
+
 @router.post("/{namespace}/{repo_name}/{revision}")
 @limiter.limit("5/minute")
 async def run_inference(
@@ -63,7 +236,7 @@ async def run_inference(
     user=Depends(get_optional_user)
 ):
     repo_id = f"{namespace}/{repo_name}"
-    repo = get_repository("model", namespace, repo_name)
+    repo = get_repository_cached("model", namespace, repo_name)
     if not repo:
         raise HTTPException(404, detail="Model not found")
         
@@ -74,13 +247,18 @@ async def run_inference(
     if isinstance(req.inputs, str) and len(req.inputs) > 2000:
         raise HTTPException(400, detail="Input too long (max 2000 chars)")
         
-    # 2. Try Local Inference
-    pipe = get_pipeline(repo_id, revision)
+    # 2. Try Local Inference (loading and running both block, so off the loop)
+    pipe = await asyncio.to_thread(get_pipeline, repo_id, revision)
     
     if pipe:
         try:
             start_time = time.time()
-            results = pipe(req.inputs, **(req.parameters or {}))
+            if _is_batchable(pipe, req.inputs):
+                results = await _infer_batched(
+                    pipe, f"{repo_id}:{revision}", req.inputs, req.parameters or {}
+                )
+            else:
+                results = await asyncio.to_thread(pipe, req.inputs, **(req.parameters or {}))
             duration = time.time() - start_time
             logger.info(f"Local inference for {repo_id} took {duration:.2f}s")
             return {"results": results, "source": "local", "duration": duration}
@@ -90,10 +268,9 @@ async def run_inference(
     # 3. Fallback to HF Inference API
     if req.token:
         try:
-            import requests
             API_URL = f"https://api-inference.huggingface.co/models/{repo_id}"
             headers = {"Authorization": f"Bearer {req.token}"}
-            response = requests.post(API_URL, headers=headers, json={"inputs": req.inputs, "parameters": req.parameters})
+            response = await _HF_CLIENT.post(API_URL, headers=headers, json={"inputs": req.inputs, "parameters": req.parameters})
             if response.status_code == 200:
                 return {"results": response.json(), "source": "huggingface"}
         except Exception as e:
@@ -101,6 +278,8 @@ async def run_inference(
             
 def create_inference_gradio(repo_id: str):
     """Creates a Gradio Blocks UI for inference, mimicking HF."""
+    import gradio as gr
+
     # Use a theme that matches HF (simplified)
     theme = gr.themes.Soft(
         primary_hue="blue",
@@ -4,6 +4,11 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
 from kohakuhub.config import cfg
 from kohakuhub.db import User, UserOrganization
 from kohakuhub.logger import get_logger
@@ -68,7 +73,7 @@ def validate_yaml(body: ValidateYamlPayload):
         Validation result
     """
     try:
-        yaml.safe_load(body.content)
+        yaml.load(body.content, Loader=SafeLoader)
     except Exception as e:
         return {"valid": False}
 
@@ -8,7 +8,7 @@ import asyncio
 
 from kohakuhub.config import cfg
 from kohakuhub.db import File, LFSObjectHistory, Repository, User, XetBlock, XetFileLayout
-from kohakuhub.db_operations import get_organization
+from kohakuhub.db_operations import forget_cached_repository, get_organization
 from kohakuhub.logger import get_logger
 from kohakuhub.utils.lakefs import get_lakefs_client, lakefs_repo_name
 
@@ -527,6 +527,7 @@ def set_repo_quota(
     # Update repository quota
     repo.quota_bytes = quota_bytes
     repo.save()
+    forget_cached_repository(repo.repo_type, repo.namespace, repo.name)
 
     logger.info(f"Set quota for repository {repo.full_id}: quota={quota_bytes} bytes")
 
@@ -548,6 +549,7 @@ async def update_repository_storage(repo: Repository) -> dict[str, int]:
     # Update repository used_bytes
     repo.used_bytes = total_bytes
     repo.save()
+    forget_cached_repository(repo.repo_type, repo.namespace, repo.name)
 
     logger.info(f"Updated storage for repository {repo.full_id}: {total_bytes:,} bytes")
 
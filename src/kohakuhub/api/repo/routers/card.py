@@ -5,7 +5,7 @@ Provides REST access to model card content and metadata.
 
 from fastapi import APIRouter, Depends, HTTPException, Body
 from kohakuhub.db import User, Repository
-from kohakuhub.db_operations import get_repository
+from kohakuhub.db_operations import get_repository_cached
 from kohakuhub.auth.dependencies import get_current_user
 from kohakuhub.utils.lakefs import get_lakefs_client
 from kohakuhub.api.repo.utils.modelcard import generate_default_card
@@ -23,7 +23,7 @@ async def get_model_card(
 ):
     """Fetch model card content from README.md."""
     repo_id = f"{namespace}/{name}"
-    repo = get_repository("model", namespace, name)
+    repo = get_repository_cached("model", namespace, name)
     if not repo:
         raise HTTPException(404, detail="Repository not found")
 
@@ -17,6 +17,7 @@ from kohakuhub.db import (
     init_db,
 )
 from kohakuhub.db_operations import (
+    forget_cached_repository,
     get_file,
     get_organization,
     get_repository,
@@ -231,6 +232,7 @@ async def delete_repo(
             # - All staging uploads (StagingUpload.repository)
             # - All LFS history (LFSObjectHistory.repository)
             repo_row.delete_instance()
+        forget_cached_repository(repo_row.repo_type, repo_row.namespace, repo_row.name)
         logger.success(f"Successfully deleted database records for: {full_id}")
     except Exception as e:
         logger.exception(f"Database deletion failed for {full_id}", e)
@@ -518,6 +520,8 @@ def _update_repository_database_records(
         quota_bytes=current_quota_bytes,
         used_bytes=current_used_bytes,
     ).where(Repository.id == repo_row.id).execute()
+    forget_cached_repository(repo_row.repo_type, from_namespace, repo_row.name)
+    forget_cached_repository(repo_row.repo_type, to_namespace, to_name)
 
     # NOTE: File and StagingUpload records don't need updating!
     # They use ForeignKey to Repository.id (which doesn't change on move).
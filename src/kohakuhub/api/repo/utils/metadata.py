@@ -4,15 +4,30 @@ This module provides utilities to parse metadata (like tags, license, and
 pipeline type) from special files like README.md (YAML frontmatter).
 """
 
+import copy
+import hashlib
 import json
+import threading
 import yaml
 from typing import Optional, Dict, Any
 
+from cachetools import LRUCache
+
 from kohakuhub.db import Repository
+from kohakuhub.db_operations import forget_cached_repository
 from kohakuhub.logger import get_logger
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
 logger = get_logger("METADATA")
 
+# Parsed frontmatter by content digest, so the same card isn't re-parsed
+_FRONTMATTER_CACHE: LRUCache = LRUCache(maxsize=1024)
+_FRONTMATTER_LOCK = threading.Lock()
+
 def parse_readme_metadata(content: str) -> Dict[str, Any]:
     """Parse YAML frontmatter from README.md content.
     
@@ -25,19 +40,28 @@ def parse_readme_metadata(content: str) -> Dict[str, Any]:
     if not content.startswith("---"):
         return {}
         
-    parts = content.split("---", 2)
-    if len(parts) < 3:
+    # Slice out just the header; splitting would copy the whole README body
+    end = content.find("\n---", 3)
+    if end < 0:
         return {}
-        
-    yaml_text = parts[1]
-    try:
-        data = yaml.safe_load(yaml_text)
-        if isinstance(data, dict):
-            return data
-    except Exception as e:
-        logger.warning(f"Failed to parse YAML frontmatter: {e}")
-        
-    return {}
+
+    yaml_text = content[3:end]
+    key = hashlib.blake2b(yaml_text.encode(), digest_size=16).digest()
+    with _FRONTMATTER_LOCK:
+        data = _FRONTMATTER_CACHE.get(key)
+    if data is None:
+        data = {}
+        try:
+            loaded = yaml.load(yaml_text, Loader=SafeLoader)
+            if isinstance(loaded, dict):
+                data = loaded
+        except Exception as e:
+            logger.warning(f"Failed to parse YAML frontmatter: {e}")
+        with _FRONTMATTER_LOCK:
+            _FRONTMATTER_CACHE[key] = data
+
+    # Callers get their own copy; the cached one stays pristine
+    return copy.deepcopy(data)
 
 def update_repository_metadata(repo: Repository, metadata: Dict[str, Any]) -> bool:
     """Update repository fields based on extracted metadata.
@@ -73,6 +97,7 @@ def update_repository_metadata(repo: Repository, metadata: Dict[str, Any]) -> bo
             
     if changed:
         repo.save()
+        forget_cached_repository(repo.repo_type, repo.namespace, repo.name)
         logger.info(f"Updated metadata for repository {repo.full_id}")
         
     return changed
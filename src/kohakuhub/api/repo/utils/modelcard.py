@@ -7,6 +7,7 @@ import json
 from typing import Dict, Any, Optional
 from huggingface_hub import ModelCard, ModelCardData
 from kohakuhub.db import Repository, File
+from kohakuhub.api.repo.utils.metadata import parse_readme_metadata, update_repository_metadata
 from kohakuhub.logger import get_logger
 
 logger = get_logger("MODEL_CARD")
@@ -48,12 +49,14 @@ def update_card_with_metrics(content: str, metrics: Dict[str, Any]) -> str:
         return content
 
 def sync_card_to_db(repo: Repository, card_content: str):
-    """Sync metadata from ModelCard back to repository database fields."""
+    """Sync metadata from the card's YAML header back to repository database fields.
+
+    Only the frontmatter is needed here, so no ModelCard is built around it.
+    """
     try:
-        card = ModelCard(card_content)
-        if card.data:
-            from kohakuhub.api.repo.utils.metadata import update_repository_metadata
+        metadata = parse_readme_metadata(card_content)
+        if metadata:
             # Reuse existing metadata updater
-            update_repository_metadata(repo, card.data.to_dict())
+            update_repository_metadata(repo, metadata)
     except Exception as e:
         logger.error(f"Failed to sync card to DB: {e}")
@@ -1,9 +1,10 @@
+import asyncio
 import os
 import signal
-import subprocess
 import socket
+import sys
 import psutil
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 
@@ -19,6 +20,12 @@ router = APIRouter(prefix="/spaces", tags=["Spaces"])
 # Global state for running spaces
 # repo_id -> {process, port, status, start_time}
 _RUNNING_SPACES: Dict[str, Dict] = {}
+# Each space gets a workspace directory under here
+_SPACES_ROOT = "/tmp/kohaku-spaces"
+# How long a stopped space gets to exit on SIGTERM before it is killed
+_STOP_GRACE_SECONDS = 5.0
+# Strong references to the per-process exit watchers
+_EXIT_WATCHERS: Set[asyncio.Task] = set()
 
 class SpaceStatus(BaseModel):
     repo_id: str
@@ -33,16 +40,65 @@ def find_free_port():
         s.bind(('', 0))
         return s.getsockname()[1]
 
-def cleanup_space(repo_id: str):
-    """Kills a running space process."""
-    if repo_id in _RUNNING_SPACES:
-        info = _RUNNING_SPACES[repo_id]
-        proc = info["process"]
+def install_child_watcher():
+    """Wait on space processes through pidfds instead of a thread per child.
+
+    Python 3.12+ already uses PidfdChildWatcher when the kernel supports it
+    (and deprecates picking one), so this only acts on 3.10/3.11, whose
+    default ThreadedChildWatcher starts a waiter thread for every spawn. On
+    other platforms and kernels before 5.3 the default watcher stays. Must be
+    called from the running loop.
+    """
+    if sys.version_info >= (3, 12) or not hasattr(os, "pidfd_open"):
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        return
+    watcher = asyncio.PidfdChildWatcher()
+    watcher.attach_loop(asyncio.get_running_loop())
+    asyncio.set_child_watcher(watcher)
+
+async def _watch_space_exit(repo_id: str, proc: asyncio.subprocess.Process):
+    """Mark the space crashed as soon as its process exits (and reap it)."""
+    returncode = await proc.wait()
+    info = _RUNNING_SPACES.get(repo_id)
+    # Ignore a process that was stopped or replaced by a redeploy
+    if info is None or info.get("process") is not proc:
+        return
+    if info["status"] == "running":
+        info["status"] = "crashed"
+        logger.warning(f"Space {repo_id} exited with code {returncode}")
+
+async def cleanup_space(repo_id: str):
+    """Stops a running space process and waits until it has been reaped.
+
+    The process group gets SIGTERM, then SIGKILL if the leader is still
+    alive after _STOP_GRACE_SECONDS. The entry is only dropped once the
+    process is gone, so its port is released before a redeploy picks one.
+    """
+    info = _RUNNING_SPACES.get(repo_id)
+    if info is None:
+        return
+    proc = info.get("process")
+    if proc is not None:
+        # Keeps _watch_space_exit from reporting the exit as a crash
+        info["status"] = "stopping"
         try:
             # Kill process group to ensure children are gone
-            os.killpg(os.getpgid(proc.pid), signal.SIGTERM)
+            pgid = os.getpgid(proc.pid)
+            os.killpg(pgid, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(proc.wait(), _STOP_GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning(f"Space {repo_id} ignored SIGTERM, killing it")
+                # The unreaped leader still holds the group id, so it can't have been reused
+                os.killpg(pgid, signal.SIGKILL)
+                await proc.wait()
         except Exception as e:
             logger.warning(f"Failed to kill space {repo_id}: {e}")
+    # A concurrent deploy may already have replaced the entry
+    if _RUNNING_SPACES.get(repo_id) is info:
         del _RUNNING_SPACES[repo_id]
 
 async def deploy_gradio_app(repo_id: str, revision: str, namespace: str, repo_name: str):
@@ -52,7 +108,7 @@ async def deploy_gradio_app(repo_id: str, revision: str, namespace: str, repo_na
         port = find_free_port()
         
         # 2. Workspace setup (simplified)
-        workspace = os.path.join("/tmp/kohaku-spaces", repo_id.replace("/", "_"))
+        workspace = os.path.join(_SPACES_ROOT, repo_id.replace("/", "_"))
         os.makedirs(workspace, exist_ok=True)
         
         # In a real implementation, we'd pull files from LakeFS/MinIO here
@@ -63,13 +119,14 @@ async def deploy_gradio_app(repo_id: str, revision: str, namespace: str, repo_na
                 f.write("import gradio as gr\ngr.Interface(lambda x: f'Hello {x}!', 'text', 'text').launch(server_name='0.0.0.0', server_port=" + str(port) + ")")
 
         # 3. Start subprocess
-        # Use preexec_fn=os.setsid to allow group killing
-        proc = subprocess.Popen(
-            ["python", "app.py"],
+        # Use a new session to allow group killing; unlike preexec_fn=os.setsid
+        # this still lets CPython spawn with vfork instead of a full fork
+        proc = await asyncio.create_subprocess_exec(
+            "python", "app.py",
             cwd=workspace,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            preexec_fn=os.setsid
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True
         )
         
         _RUNNING_SPACES[repo_id] = {
@@ -78,6 +135,9 @@ async def deploy_gradio_app(repo_id: str, revision: str, namespace: str, repo_na
             "status": "running",
             "revision": revision
         }
+        watcher = asyncio.create_task(_watch_space_exit(repo_id, proc))
+        _EXIT_WATCHERS.add(watcher)
+        watcher.add_done_callback(_EXIT_WATCHERS.discard)
         logger.info(f"Deployed space {repo_id} on port {port}")
         
     except Exception as e:
@@ -100,7 +160,7 @@ async def deploy_space(
     check_repo_read_permission(repo, user)
     
     # If already running, stop it first
-    cleanup_space(repo_id)
+    await cleanup_space(repo_id)
     
     _RUNNING_SPACES[repo_id] = {"status": "starting"}
     background_tasks.add_task(deploy_gradio_app, repo_id, revision, namespace, repo_name)
@@ -114,14 +174,8 @@ async def get_space_status(namespace: str, repo_name: str):
         return {"status": "stopped"}
         
     info = _RUNNING_SPACES[repo_id]
+    # Kept current by _watch_space_exit, no need to check the process here
     status = info["status"]
-    
-    # Verification: check if process is still alive
-    if status == "running":
-        proc = info["process"]
-        if proc.poll() is not None:
-            status = "crashed"
-            info["status"] = "crashed"
             
     return {
         "repo_id": repo_id,
@@ -134,7 +188,7 @@ async def get_space_status(namespace: str, repo_name: str):
 @router.post("/stop/{namespace}/{repo_name}")
 async def stop_space(namespace: str, repo_name: str):
     repo_id = f"{namespace}/{repo_name}"
-    cleanup_space(repo_id)
+    await cleanup_space(repo_id)
     return {"message": "Space stopped", "repo_id": repo_id}
 
 @router.get("/list")
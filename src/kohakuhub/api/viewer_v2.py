@@ -2,9 +2,8 @@ import os
 import pandas as pd
 import gradio as gr
 from fastapi import APIRouter, Depends, HTTPException, Request
-from transformers import pipeline
-import datasets
 from huggingface_hub import list_repo_files, get_repo_type
+from kohakuhub.api.datasets.lazy import lazy_datasets
 from kohakuhub.config import cfg
 from kohakuhub.logger import get_logger
 from kohakuhub.utils.lakefs import get_lakefs_client, lakefs_repo_name
@@ -58,7 +57,7 @@ def create_hf_dataset_viewer(repo_id: str, revision: str, data_files: list = Non
                         # Load using datasets library with local presigned URLs
                         # Deterministic format detection based on first file
                         ds_type = "parquet" if data_files[0].split('?')[0].endswith(".parquet") else "csv"
-                        ds = datasets.load_dataset(ds_type, 
+                        ds = lazy_datasets().load_dataset(ds_type, 
                                                  data_files={"train": data_files}, 
                                                  streaming=True)
                         sample_ds = ds["train"].take(50)
@@ -78,6 +77,9 @@ def create_hf_dataset_viewer(repo_id: str, revision: str, data_files: list = Non
 def create_hf_model_widget(repo_id: str):
     """Creates a transformers-based Gradio Interface for model inference."""
     try:
+        # Imported here: transformers pulls in torch
+        from transformers import pipeline
+
         # Auto-detect task or default to text-classification
         pipe = pipeline(model=repo_id, device_map="auto")
         
@@ -1,24 +1,214 @@
 """Xet chunking logic."""
 
+import asyncio
 import hashlib
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
+import numpy as np
+from peewee import chunked
+
+from kohakuhub.async_utils import run_in_s3_executor
 from kohakuhub.config import cfg
 from kohakuhub.db import File, XetBlock, XetFileLayout, db
 from kohakuhub.logger import get_logger
-from kohakuhub.utils.s3 import get_s3_client
-from kohakuhub.utils.xet import get_xet_block_s3_key, mark_block_as_existing, mark_block_in_bloom
+from kohakuhub.api.xet.metrics import metrics
+from kohakuhub.utils.s3 import get_s3_client, object_exists
+from kohakuhub.utils.xet import (
+    check_block_exists_bloom,
+    get_xet_block_s3_key,
+    mark_block_as_existing,
+    mark_block_in_bloom,
+)
 
 logger = get_logger("XET_CHUNKER")
 
-# Simulated CDC target chunk size: 4MB
+# Content-defined chunking: average chunk size 4MB, bounded to [1MB, 16MB]
 CHUNK_TARGET_SIZE = 4 * 1024 * 1024
+_CDC_MIN_SIZE = 1024 * 1024
+_CDC_MAX_SIZE = 16 * 1024 * 1024
+# Bytes each boundary decision looks at, and bytes hashed per vectorized pass
+_CDC_WINDOW = 64
+_CDC_SCAN_BLOCK = 1024 * 1024
+
+# Rows per INSERT, below SQLite's bound-parameter limit
+_INSERT_BATCH = 100
+
+
+def _gear_table() -> np.ndarray:
+    # Fixed, derivable byte weights, so boundaries agree across processes and releases
+    return np.array(
+        [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:4], "big") for i in range(256)],
+        dtype=np.uint64,
+    )
+
+
+_GEAR = _gear_table()
+# Odd base, so it's invertible modulo 2**64 (and hence 2**32)
+_BASE = 0x9E3779B1
+_POW = np.cumprod(np.full(_CDC_SCAN_BLOCK + _CDC_WINDOW, _BASE, dtype=np.uint64), dtype=np.uint64)
+_POW = np.concatenate(([np.uint64(1)], _POW[:-1]))
+_INV_POW = np.cumprod(
+    np.full(_CDC_SCAN_BLOCK + _CDC_WINDOW, pow(_BASE, -1, 2**64), dtype=np.uint64), dtype=np.uint64
+)
+_INV_POW = np.concatenate(([np.uint64(1)], _INV_POW[:-1]))
+# A window ends a chunk when its hash falls below this, i.e. with probability
+# 1 / (avg - min) per byte past the minimum size, for chunks averaging ~avg
+_CDC_THRESHOLD = (1 << 32) // (CHUNK_TARGET_SIZE - _CDC_MIN_SIZE)
+
+
+def _window_hashes(buffer: bytearray, start: int, end: int) -> np.ndarray:
+    """Rolling hashes of the _CDC_WINDOW bytes ending at each of [start, end).
+
+    H(i) = sum(g[b[i-d]] * B**d for d < window) mod 2**32, computed for the
+    whole range at once: with prefix sums P of g[b[j]] * B**-j, each window is
+    B**i * (P[i] - P[i-window]). All of it wraps modulo 2**64, which reduces
+    correctly modulo 2**32.
+    """
+    first = start - _CDC_WINDOW + 1
+    weights = _GEAR[np.frombuffer(buffer, dtype=np.uint8, count=end - first, offset=first)]
+    n = len(weights)
+    prefix = np.cumsum(weights * _INV_POW[:n], dtype=np.uint64)
+    sums = prefix[_CDC_WINDOW - 1 :].copy()
+    sums[1:] -= prefix[: n - _CDC_WINDOW]
+    return (sums * _POW[_CDC_WINDOW - 1 : n]) & np.uint64(0xFFFFFFFF)
+
+
+def _cut_point(buffer: bytearray) -> int:
+    """Length of the next content-defined chunk at the start of the buffer.
+
+    Boundaries depend only on the bytes around them, so an insertion early in
+    a file shifts its first chunk but leaves the rest deduplicating. The
+    first _CDC_MIN_SIZE bytes are never hashed; a chunk is cut at
+    _CDC_MAX_SIZE if no boundary turns up, or at the end of the buffer.
+    """
+    end = min(len(buffer), _CDC_MAX_SIZE)
+    for block_start in range(_CDC_MIN_SIZE, end, _CDC_SCAN_BLOCK):
+        block_end = min(block_start + _CDC_SCAN_BLOCK, end)
+        hits = np.flatnonzero(_window_hashes(buffer, block_start, block_end) < _CDC_THRESHOLD)
+        if hits.size:
+            return block_start + int(hits[0]) + 1
+    return end
+
+
+class _ChunkReader:
+    """Splits a streaming body into content-defined (hash, data) chunks."""
+
+    def __init__(self, body):
+        self.body = body
+        self.buffer = bytearray()
+        self.eof = False
+
+    def next_chunk(self) -> Optional[Tuple[str, bytes]]:
+        """Read, cut and hash the next chunk; None at the end."""
+        # Hold a full maximum-size window (or the rest of the object) so the
+        # cut point doesn't depend on how the network delivered the bytes
+        while not self.eof and len(self.buffer) < _CDC_MAX_SIZE:
+            data = self.body.read(_CDC_MAX_SIZE - len(self.buffer))
+            if data:
+                self.buffer += data
+            else:
+                self.eof = True
+        if not self.buffer:
+            return None
+
+        cut = _cut_point(self.buffer)
+        chunk_data = bytes(self.buffer[:cut])
+        del self.buffer[:cut]
+        return hashlib.sha256(chunk_data).hexdigest(), chunk_data
+
+
+async def _stream_blocks(s3, lfs_key: str) -> List[Tuple[str, int]]:
+    """Stream an LFS object into blocks, uploading each distinct new block once.
+
+    The semaphore admits a chunk before it is read and frees it once it's
+    uploaded (or found to be a repeat), so at most xet.upload_concurrency
+    chunks are resident however large the file is.
+
+    Returns:
+        (hash, size) of every chunk, in file order
+    """
+    response = await run_in_s3_executor(s3.get_object, Bucket=cfg.s3.bucket, Key=lfs_key)
+    body = response['Body']
+    reader = _ChunkReader(body)
+    semaphore = asyncio.Semaphore(cfg.xet.upload_concurrency)
+
+    async def upload(chash: str, cdata: bytes):
+        try:
+            s3_key = get_xet_block_s3_key(chash)
+            # A bloom miss is definite; a hit may be a false positive, so it's
+            # confirmed with a HEAD before the PUT is skipped
+            if await check_block_exists_bloom(chash) and await object_exists(cfg.s3.bucket, s3_key):
+                metrics.record_dedup(hit=True, size=len(cdata))
+                return
+            await run_in_s3_executor(
+                s3.put_object,
+                Bucket=cfg.s3.bucket,
+                Key=s3_key,
+                Body=cdata,
+                ContentType="application/octet-stream",
+            )
+            metrics.record_dedup(hit=False, size=len(cdata))
+        finally:
+            semaphore.release()
+
+    chunks = []
+    uploads = {}
+    try:
+        while True:
+            await semaphore.acquire()
+            chunk = await run_in_s3_executor(reader.next_chunk)
+            if chunk is None or chunk[0] in uploads:
+                semaphore.release()
+                if chunk is None:
+                    break
+            else:
+                uploads[chunk[0]] = asyncio.create_task(upload(*chunk))
+            chunks.append((chunk[0], len(chunk[1])))
+        await asyncio.gather(*uploads.values())
+    except BaseException:
+        for task in uploads.values():
+            task.cancel()
+        await asyncio.gather(*uploads.values(), return_exceptions=True)
+        raise
+    finally:
+        body.close()
+    return chunks
+
+
+def _register_layout(file_record: File, chunks: List[Tuple[str, int]]) -> None:
+    """Register blocks and the file's layout in one transaction."""
+    sizes = dict(chunks)
+    with db.atomic():
+        for batch in chunked([{"hash": h, "size": n} for h, n in sizes.items()], _INSERT_BATCH):
+            XetBlock.insert_many(batch).on_conflict_ignore().execute()
+
+        block_ids = {}
+        for batch in chunked(list(sizes), _INSERT_BATCH):
+            block_ids.update(
+                XetBlock.select(XetBlock.hash, XetBlock.id).where(XetBlock.hash.in_(batch)).tuples()
+            )
+
+        layout = []
+        file_offset = 0
+        for seq, (chash, size) in enumerate(chunks):
+            layout.append({
+                "file": file_record.id,
+                "block": block_ids[chash],
+                "sequence_order": seq,
+                "file_offset": file_offset,
+            })
+            file_offset += size
+        for batch in chunked(layout, _INSERT_BATCH):
+            XetFileLayout.insert_many(batch).execute()
 
 
 async def chunk_lfs_file(file_record: File) -> bool:
     """Chunks an LFS file and creates XetFileLayout.
     
     This allows LFS files to be deduplicated and reconstructed via the Xet CAS hub.
+    The object is streamed chunk by chunk (read, cut and hashed on the S3 executor)
+    with blocks uploading concurrently, and the database is only written once
+    every block is stored.
     """
     if not file_record.lfs:
         return False
@@ -33,52 +223,15 @@ async def chunk_lfs_file(file_record: File) -> bool:
     s3 = get_s3_client()
     lfs_key = f"lfs/{file_record.sha256[:2]}/{file_record.sha256[2:4]}/{file_record.sha256}"
     
+    # Stream and upload blocks, then register blocks and layout
     try:
-        response = s3.get_object(Bucket=cfg.s3.bucket, Key=lfs_key)
-        content = response['Body'].read()
-    except Exception as e:
-        logger.error(f"Failed to fetch LFS object {file_record.sha256} for chunking: {e}")
-        return False
-
-    # Split into chunks (simulated CDC - just fixed size for now in this demo impl)
-    # In production, we'd use a real CDC algorithm or call a Rust sidecar.
-    chunks = []
-    for i in range(0, len(content), CHUNK_TARGET_SIZE):
-        chunk_data = content[i:i+CHUNK_TARGET_SIZE]
-        chunk_hash = hashlib.sha256(chunk_data).hexdigest()
-        chunks.append((chunk_hash, chunk_data))
+        chunks = await _stream_blocks(s3, lfs_key)
+        _register_layout(file_record, chunks)
 
-    # Register blocks and layout
-    try:
-        with db.atomic():
-            for seq, (chash, cdata) in enumerate(chunks):
-                # 1. Register block
-                block, created = XetBlock.get_or_create(
-                    hash=chash,
-                    defaults={"size": len(cdata)}
-                )
-                
-                # 2. Upload block if new
-                s3_key = get_xet_block_s3_key(chash)
-                # Note: In a real high-perf system, we'd check existence first
-                # But here we just upload to ensure it's there.
-                s3.put_object(
-                    Bucket=cfg.s3.bucket,
-                    Key=s3_key,
-                    Body=cdata,
-                    ContentType="application/octet-stream"
-                )
-                
-                # 3. Create layout entry
-                XetFileLayout.create(
-                    file=file_record,
-                    block=block,
-                    sequence_order=seq
-                )
-                
-                # 4. Update Redis
-                await mark_block_as_existing(chash)
-                await mark_block_in_bloom(chash)
+        # Update Redis
+        for chash in dict(chunks):
+            await mark_block_as_existing(chash)
+            await mark_block_in_bloom(chash)
 
         logger.success(f"Successfully chunked {file_record.path_in_repo} into {len(chunks)} blocks.")
         return True
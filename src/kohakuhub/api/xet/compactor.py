@@ -5,6 +5,7 @@ import hashlib
 import uuid
 from typing import List
 
+from kohakuhub.async_utils import run_in_s3_executor
 from kohakuhub.config import cfg
 from kohakuhub.db import XetBlock, XetXorb, XetBlockPlacement, db
 from kohakuhub.logger import get_logger
@@ -15,6 +16,10 @@ logger = get_logger("XET_COMPACTOR")
 
 # Target XORB size: 100MB
 TARGET_XORB_SIZE = 100 * 1024 * 1024
+# Block copies, downloads and part uploads in flight per XORB
+_FETCH_CONCURRENCY = 16
+# S3's minimum size for every part of a multipart upload but the last
+_MIN_PART_SIZE = 5 * 1024 * 1024
 
 
 async def compact_blocks():
@@ -46,52 +51,121 @@ async def compact_blocks():
         await _create_xorb_from_batch(current_batch)
 
 
+def _fetch_block(s3, block: XetBlock) -> bytes:
+    response = s3.get_object(Bucket=cfg.s3.bucket, Key=get_xet_block_s3_key(block.hash))
+    return response['Body'].read()
+
+
 async def _create_xorb_from_batch(blocks: List[XetBlock]):
-    """Merges a batch of blocks into a single XORB on S3."""
+    """Merges a batch of blocks into a single XORB on S3.
+
+    The XORB is a multipart upload. Blocks big enough to be a part on their
+    own are copied server-side with UploadPartCopy; only the smaller ones are
+    downloaded and packed into parts here. Placements record every offset,
+    so the copied blocks simply go first.
+    """
     xorb_id = str(uuid.uuid4())
     logger.info(f"Creating Xorb {xorb_id} from {len(blocks)} blocks...")
     
     s3 = get_s3_client()
-    xorb_content = bytearray()
-    placements = []
-    
-    offset = 0
-    for block in blocks:
-        s3_key = get_xet_block_s3_key(block.hash)
-        try:
-            # Fetch individual block
-            response = s3.get_object(Bucket=cfg.s3.bucket, Key=s3_key)
-            data = response['Body'].read()
-            
-            xorb_content.extend(data)
-            placements.append({
-                "block": block,
-                "offset": offset,
-                "length": block.size
-            })
-            offset += block.size
-        except Exception as e:
-            logger.error(f"Failed to fetch block {block.hash} for compaction: {e}")
-            continue
-
-    if not xorb_content:
-        return
-
-    # Upload XORB
     xorb_s3_key = get_xet_xorb_s3_key(xorb_id)
-    s3.put_object(
+    slots = asyncio.Semaphore(_FETCH_CONCURRENCY)
+    copied = [block for block in blocks if block.size >= _MIN_PART_SIZE]
+    fetched = [block for block in blocks if block.size < _MIN_PART_SIZE]
+
+    upload = await run_in_s3_executor(
+        s3.create_multipart_upload,
         Bucket=cfg.s3.bucket,
         Key=xorb_s3_key,
-        Body=bytes(xorb_content),
         ContentType="application/octet-stream"
     )
+    upload_args = {"Bucket": cfg.s3.bucket, "Key": xorb_s3_key, "UploadId": upload["UploadId"]}
+
+    async def copy_part(block: XetBlock, part_number: int):
+        async with slots:
+            try:
+                response = await run_in_s3_executor(
+                    s3.upload_part_copy,
+                    PartNumber=part_number,
+                    CopySource={"Bucket": cfg.s3.bucket, "Key": get_xet_block_s3_key(block.hash)},
+                    **upload_args
+                )
+            except Exception as e:
+                logger.error(f"Failed to copy block {block.hash} for compaction: {e}")
+                return None
+            return response["CopyPartResult"]["ETag"]
+
+    async def fetch(block: XetBlock):
+        async with slots:
+            try:
+                return await run_in_s3_executor(_fetch_block, s3, block)
+            except Exception as e:
+                logger.error(f"Failed to fetch block {block.hash} for compaction: {e}")
+                return None
+
+    async def upload_part(body: bytes, part_number: int):
+        async with slots:
+            response = await run_in_s3_executor(
+                s3.upload_part, PartNumber=part_number, Body=body, **upload_args
+            )
+            return response["ETag"]
+
+    try:
+        copy_etags, datas = await asyncio.gather(
+            asyncio.gather(*(copy_part(block, n) for n, block in enumerate(copied, 1))),
+            asyncio.gather(*(fetch(block) for block in fetched)),
+        )
+
+        parts = []
+        placements = []
+        offset = 0
+        for n, (block, etag) in enumerate(zip(copied, copy_etags), 1):
+            if etag is None:
+                continue
+            parts.append({"PartNumber": n, "ETag": etag})
+            placements.append({"block": block, "offset": offset, "length": block.size})
+            offset += block.size
+
+        # Pack the small blocks into parts of at least the minimum size;
+        # only the final part may come up short
+        bodies = []
+        pending = []
+        pending_size = 0
+        for block, data in zip(fetched, datas):
+            if data is None:
+                continue
+            pending.append(data)
+            pending_size += len(data)
+            placements.append({"block": block, "offset": offset, "length": block.size})
+            offset += block.size
+            if pending_size >= _MIN_PART_SIZE:
+                bodies.append(b"".join(pending))
+                pending = []
+                pending_size = 0
+        if pending:
+            bodies.append(b"".join(pending))
+
+        first = len(copied) + 1
+        etags = await asyncio.gather(*(upload_part(body, n) for n, body in enumerate(bodies, first)))
+        parts.extend({"PartNumber": n, "ETag": etag} for n, etag in enumerate(etags, first))
+
+        if not parts:
+            await run_in_s3_executor(s3.abort_multipart_upload, **upload_args)
+            return
+
+        await run_in_s3_executor(
+            s3.complete_multipart_upload, MultipartUpload={"Parts": parts}, **upload_args
+        )
+    except Exception:
+        await run_in_s3_executor(s3.abort_multipart_upload, **upload_args)
+        raise
 
     # Update Database
     with db.atomic():
         xorb = XetXorb.create(
             xorb_id=xorb_id,
             storage_key=xorb_s3_key,
-            size=len(xorb_content)
+            size=offset
         )
         
         for p in placements:
@@ -102,7 +176,7 @@ async def _create_xorb_from_batch(blocks: List[XetBlock]):
                 length=p["length"]
             )
             
-    logger.success(f"Compacted {len(blocks)} blocks into Xorb {xorb_id} ({len(xorb_content)} bytes)")
+    logger.success(f"Compacted {len(blocks)} blocks into Xorb {xorb_id} ({offset} bytes)")
     
     # Optional: Cleanup individual blocks (in a real production app, we might wait 24h)
     # for block in blocks:
@@ -27,6 +27,16 @@ class XetMetrics:
             return 0.0
         return self.dedup_hits / total
 
+    def snapshot(self) -> dict:
+        """Current counters, for the admin metrics endpoint."""
+        return {
+            "dedup_hits": self.dedup_hits,
+            "dedup_misses": self.dedup_misses,
+            "dedup_ratio": self.get_dedup_ratio(),
+            "total_bytes_saved": self.total_bytes_saved,
+            "total_bytes_uploaded": self.total_bytes_uploaded,
+        }
+
     def log_stats(self):
         ratio = self.get_dedup_ratio() * 100
         saved_mb = self.total_bytes_saved / (1024 * 1024)
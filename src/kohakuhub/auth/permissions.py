@@ -6,7 +6,11 @@ from fastapi import HTTPException
 
 from kohakuhub.db import Repository, User, DatasetAccessRequest
 from kohakuhub.constants import ERROR_USER_AUTH_REQUIRED
-from kohakuhub.db_operations import get_organization, get_user_organization
+from kohakuhub.db_operations import (
+    get_organization,
+    get_user_organization,
+    get_user_organization_by_name,
+)
 
 
 def check_namespace_permission(
@@ -73,13 +77,16 @@ def check_gated_access(repo: Repository, user: Optional[User]) -> bool:
     if not user:
         return False
         
-    # Check for approved request
-    request = DatasetAccessRequest.get_or_none(
-        (DatasetAccessRequest.user == user) & 
-        (DatasetAccessRequest.repository == repo) & 
-        (DatasetAccessRequest.status == "approved")
+    # Check for approved request; (user, repository) is a unique index
+    return (
+        DatasetAccessRequest.select(DatasetAccessRequest.id)
+        .where(
+            (DatasetAccessRequest.user == user)
+            & (DatasetAccessRequest.repository == repo)
+            & (DatasetAccessRequest.status == "approved")
+        )
+        .exists()
     )
-    return request is not None
 
 
 def check_repo_read_permission(
@@ -111,12 +118,8 @@ def check_repo_read_permission(
     if user:
         if repo.namespace == user.username:
             is_owner_or_member = True
-        else:
-            org = get_organization(repo.namespace)
-            if org:
-                membership = get_user_organization(user, org)
-                if membership:
-                    is_owner_or_member = True
+        elif get_user_organization_by_name(user, repo.namespace):
+            is_owner_or_member = True
 
     # 2. Handle gating for non-owners/members
     if repo.gated and not is_owner_or_member:
@@ -181,13 +184,11 @@ def check_repo_write_permission(
         return True
 
     # Check if namespace is an organization and user is a member
-    org = get_organization(repo.namespace)
-    if org:
-        membership = get_user_organization(user, org)
-        if membership:
-            # Any member can write (visitor role can also read but not write)
-            if membership.role in ["member", "admin", "super-admin"]:
-                return True
+    membership = get_user_organization_by_name(user, repo.namespace)
+    if membership:
+        # Any member can write (visitor role can also read but not write)
+        if membership.role in ["member", "admin", "super-admin"]:
+            return True
 
     raise HTTPException(
         403, detail=f"You don't have permission to modify repository '{repo.full_id}'"
@@ -226,11 +227,9 @@ def check_repo_delete_permission(
         return True
 
     # Check if namespace is an organization and user is admin
-    org = get_organization(repo.namespace)
-    if org:
-        membership = get_user_organization(user, org)
-        if membership and membership.role in ["admin", "super-admin"]:
-            return True
+    membership = get_user_organization_by_name(user, repo.namespace)
+    if membership and membership.role in ["admin", "super-admin"]:
+        return True
 
     raise HTTPException(
         403, detail=f"You don't have permission to delete repository '{repo.full_id}'"
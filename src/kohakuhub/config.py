@@ -80,6 +80,7 @@ class XetConfig(BaseModel):
     cas_cache_max_size_gb: int = 10
     cas_shard_generation_interval: int = 3600  # 1 hour
     cas_compaction_interval: int = 3600  # 1 hour
+    upload_concurrency: int = 8  # Concurrent block uploads per chunked file
 
 
 class FallbackConfig(BaseModel):
@@ -101,6 +102,9 @@ class AppConfig(BaseModel):
     db_backend: str = "sqlite"
     # Optional features
     disable_dataset_viewer: bool = False
+    # Shrink locally served inference models before caching them:
+    # int8 dynamic quantization on CPU, bfloat16 on GPUs that support it
+    inference_quantize: bool = False
     database_url: str = "sqlite:///./hub.db"
     database_key: str = (
         ""  # Encryption key for external tokens (generate with: openssl rand -hex 32)
@@ -440,6 +444,8 @@ def load_config(path: str = None) -> Config:
         xet_env["cas_shard_generation_interval"] = int(os.environ["KOHAKU_HUB_XET_SHARD_GEN_INTERVAL"])
     if "KOHAKU_HUB_XET_COMPACTION_INTERVAL" in os.environ:
         xet_env["cas_compaction_interval"] = int(os.environ["KOHAKU_HUB_XET_COMPACTION_INTERVAL"])
+    if "KOHAKU_HUB_XET_UPLOAD_CONCURRENCY" in os.environ:
+        xet_env["upload_concurrency"] = int(os.environ["KOHAKU_HUB_XET_UPLOAD_CONCURRENCY"])
     if xet_env:
         config_from_env["xet"] = xet_env
 
@@ -453,6 +459,10 @@ def load_config(path: str = None) -> Config:
         app_env["disable_dataset_viewer"] = (
             os.environ["KOHAKU_HUB_DISABLE_DATASET_VIEWER"].lower() == "true"
         )
+    if "KOHAKU_HUB_INFERENCE_QUANTIZE" in os.environ:
+        app_env["inference_quantize"] = (
+            os.environ["KOHAKU_HUB_INFERENCE_QUANTIZE"].lower() == "true"
+        )
     if "KOHAKU_HUB_DB_BACKEND" in os.environ:
         app_env["db_backend"] = os.environ["KOHAKU_HUB_DB_BACKEND"]
     if "KOHAKU_HUB_DATABASE_URL" in os.environ:
@@ -574,7 +574,10 @@ class DatasetLineage(BaseModel):
     created_at = DateTimeField(default=partial(datetime.now, tz=timezone.utc))
 
     class Meta:
-        indexes = ((("repository", "revision"), True),)
+        indexes = (
+            (("repository", "revision"), True),
+            (("repository", "created_at"), False),  # Newest-first lineage listing
+        )
 
 
 class DatasetSnapshot(BaseModel):
@@ -596,12 +599,34 @@ class DatasetSnapshot(BaseModel):
         indexes = ((("repository", "revision"), True),)
 
 
+class DatasetStatsCache(BaseModel):
+    """Split statistics computed for an exact upstream dataset commit.
+
+    A given (repo, revision, config, split, sample_size) always samples the same
+    rows, so results are reused until the dataset moves to a new commit.
+    """
+
+    id = AutoField()
+    repo_id = CharField(index=True)  # Upstream dataset id (namespace/name)
+    revision = CharField()  # Upstream commit SHA the stats were computed at
+    config = CharField()
+    split = CharField()
+    sample_size = IntegerField()
+    stats_json = TextField()  # JSON dump of SplitStatisticsResponse
+    computed_at = DateTimeField(default=partial(datetime.now, tz=timezone.utc))
+
+    class Meta:
+        indexes = (
+            (("repo_id", "revision", "config", "split", "sample_size"), True),
+        )
+
+
 class XetBlock(BaseModel):
     """Content-addressed data block (chunk)."""
 
     id = AutoField()
     hash = CharField(unique=True, index=True)  # SHA256 of the block content
-    size = BigIntegerField()
+    size = BigIntegerField(index=True)  # Indexed for admin size aggregates/buckets
     created_at = DateTimeField(default=partial(datetime.now, tz=timezone.utc))
 
 
@@ -611,7 +636,7 @@ class XetXorb(BaseModel):
     id = AutoField()
     xorb_id = CharField(unique=True, index=True)  # Generally SHA256 of the xorb content
     storage_key = CharField()  # S3 key where the xorb is stored
-    size = BigIntegerField()
+    size = BigIntegerField(index=True)
     created_at = DateTimeField(default=partial(datetime.now, tz=timezone.utc))
 
 
@@ -689,6 +714,7 @@ def init_db():
             DatasetAccessRequest,
             DatasetLineage,
             DatasetSnapshot,
+            DatasetStatsCache,
             XetBlock,
             XetXorb,
             XetShard,
@@ -8,9 +8,12 @@ All operations now use proper ForeignKey relationships with backref for convenie
 """
 
 import json
+import threading
 import uuid
 from datetime import datetime, timedelta, timezone
 
+from cachetools import TTLCache
+
 from kohakuhub.config import cfg
 from kohakuhub.logger import get_logger
 from kohakuhub.db import (
@@ -181,6 +184,34 @@ def get_repository(repo_type: str, namespace: str, name: str) -> Repository | No
     )
 
 
+# Short-lived cache for read-only hot paths; writes through this module evict
+# their key, and the TTL bounds staleness from writes that bypass it
+_REPOSITORY_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=5.0)
+_REPOSITORY_CACHE_LOCK = threading.Lock()
+
+
+def get_repository_cached(repo_type: str, namespace: str, name: str) -> Repository | None:
+    """Get repository like get_repository(), reusing a lookup from the last few seconds.
+
+    The returned row may be shared with other requests: only read it. Paths
+    that modify the repository should use get_repository().
+    """
+    key = (repo_type, namespace, name)
+    with _REPOSITORY_CACHE_LOCK:
+        if key in _REPOSITORY_CACHE:
+            return _REPOSITORY_CACHE[key]
+    repo = get_repository(repo_type, namespace, name)
+    with _REPOSITORY_CACHE_LOCK:
+        _REPOSITORY_CACHE[key] = repo
+    return repo
+
+
+def forget_cached_repository(repo_type: str, namespace: str, name: str) -> None:
+    """Drop a repository from the lookup cache after it changes."""
+    with _REPOSITORY_CACHE_LOCK:
+        _REPOSITORY_CACHE.pop((repo_type, namespace, name), None)
+
+
 def get_repository_by_full_id(full_id: str, repo_type: str) -> Repository | None:
     """Get repository by full ID and type."""
     return Repository.get_or_none(
@@ -200,7 +231,7 @@ def create_repository(
 
     NOTE: Wrap in db.atomic() if checking existence first.
     """
-    return Repository.create(
+    repo = Repository.create(
         repo_type=repo_type,
         namespace=namespace,
         name=name,
@@ -208,6 +239,9 @@ def create_repository(
         private=private,
         owner=owner,  # ForeignKey to User (can be user or org)
     )
+    # A recent miss for this name may be cached
+    forget_cached_repository(repo_type, namespace, name)
+    return repo
 
 
 def delete_repository(repo: Repository) -> None:
@@ -220,6 +254,7 @@ def delete_repository(repo: Repository) -> None:
     - All LFS history (LFSObjectHistory.repository)
     """
     repo.delete_instance()
+    forget_cached_repository(repo.repo_type, repo.namespace, repo.name)
 
 
 def update_repository(repo: Repository, **fields) -> None:
@@ -227,6 +262,7 @@ def update_repository(repo: Repository, **fields) -> None:
     for key, value in fields.items():
         setattr(repo, key, value)
     repo.save()
+    forget_cached_repository(repo.repo_type, repo.namespace, repo.name)
 
 
 def list_repositories(
@@ -410,6 +446,20 @@ def get_user_organization(user: User, org: User) -> UserOrganization | None:
     )
 
 
+def get_user_organization_by_name(user: User, org_name: str) -> UserOrganization | None:
+    """Get a user's membership in the organization named org_name (single query)."""
+    return (
+        UserOrganization.select()
+        .join(User, on=(UserOrganization.organization == User.id))
+        .where(
+            (UserOrganization.user == user)
+            & (User.username == org_name)
+            & (User.is_org == True)
+        )
+        .first()
+    )
+
+
 def create_user_organization(user: User, org: User, role: str) -> UserOrganization:
     """Create user-organization relationship with ForeignKeys."""
     return UserOrganization.create(user=user, organization=org, role=role)
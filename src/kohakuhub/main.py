@@ -65,6 +65,16 @@ async def lifespan(app: FastAPI):
         logger.warning("=" * 80)
 
     init_storage()
+
+    if not cfg.app.disable_dataset_viewer:
+        from kohakuhub.api.datasets.metadata import configure_hf_endpoint
+
+        logger.info(f"Dataset viewer HF endpoint: {configure_hf_endpoint()}")
+
+        # Spaces are mounted alongside the viewer; reap their processes via pidfds
+        from kohakuhub.api.spaces import install_child_watcher
+
+        install_child_watcher()
     
     # Start Xet background worker
     import asyncio
@@ -0,0 +1,159 @@
+from unittest.mock import MagicMock
+
+import pyarrow as pa
+import pyarrow.dataset as pads
+import pyarrow.parquet as pq
+import pytest
+
+from kohakuhub.api.datasets import metadata
+from kohakuhub.api.datasets.viewer import (
+    _compile_where,
+    _read_row_range,
+    _where_matches,
+    _where_to_expression,
+)
+
+# Nullable columns, so every comparison also meets None
+TABLE = pa.table({
+    "a": [1, 2, None, 4, 5, None],
+    "b": [1, None, 3, 4, None, None],
+    "name": ["x", "y", None, "x", "z", "y"],
+})
+
+FILTERS = [
+    "a == 2",
+    "a != 2",
+    "a == None",
+    "a != None",
+    "a == b",
+    "a != b",
+    "name in ('x', 'z')",
+    "name not in ('x', 'z')",
+    "a < 3",
+    "not a < 3",
+    "not a >= 4",
+    "1 < a <= 4",
+    "not 1 < a <= 4",
+    "a != None and a < 3",
+    "a == None or a > 3",
+    "a > 3 or b == 3",
+    "b == 3 or a > 3",
+    "not (a < 3 and name == 'x')",
+    "a < b",
+]
+
+
+def _python_rows(where: str) -> list:
+    """Rows kept by the row-by-row (streaming) filter."""
+    code = _compile_where(where)[1]
+    return [row for row in TABLE.to_pylist() if _where_matches(code, row)]
+
+
+@pytest.mark.parametrize("where", FILTERS)
+def test_where_expression_matches_python_filter(where):
+    """The Arrow (Parquet) filter keeps exactly the rows the streaming filter keeps."""
+    expression = _where_to_expression(where)
+    assert expression is not None
+
+    arrow_rows = pads.dataset(TABLE).to_table(filter=expression).to_pylist()
+    assert arrow_rows == _python_rows(where)
+
+
+def test_negated_ordering_excludes_nulls():
+    """`not a < 3` doesn't match rows where `a` is None on either path."""
+    expression = _where_to_expression("not a < 3")
+    arrow_rows = pads.dataset(TABLE).to_table(filter=expression).to_pylist()
+    assert [row["a"] for row in arrow_rows] == [4, 5]
+    assert [row["a"] for row in _python_rows("not a < 3")] == [4, 5]
+
+
+def test_unsupported_where_falls_back():
+    """Filters Arrow can't express are left to the row-by-row path."""
+    assert _where_to_expression("a") is None
+    assert _where_to_expression("a in b") is None
+
+
+@pytest.fixture
+def multi_file_dataset(tmp_path):
+    """Three Parquet files of 25, 7 and 40 rows, in row groups of 10."""
+    start = 0
+    for index, num_rows in enumerate([25, 7, 40]):
+        table = pa.table({
+            "id": list(range(start, start + num_rows)),
+            "text": [f"row {i}" for i in range(start, start + num_rows)],
+        })
+        pq.write_table(table, tmp_path / f"part-{index}.parquet", row_group_size=10)
+        start += num_rows
+    return pads.dataset(sorted(str(path) for path in tmp_path.glob("*.parquet")), format="parquet")
+
+
+@pytest.mark.parametrize(
+    "offset,limit",
+    [
+        (0, 5),      # inside the first row group
+        (8, 5),      # straddles a row group boundary
+        (20, 10),    # straddles the first file boundary
+        (24, 1),     # last row of the first file
+        (25, 7),     # exactly the second file
+        (28, 20),    # spans all three files
+        (0, 72),     # everything
+        (65, 20),    # runs past the end
+        (72, 5),     # starts at the end
+        (100, 5),    # starts past the end
+    ],
+)
+def test_read_row_range_matches_slice(multi_file_dataset, offset, limit):
+    """Row-group seeking returns the same rows as slicing the whole table."""
+    expected = multi_file_dataset.to_table().slice(offset, limit)
+    table = _read_row_range(multi_file_dataset, ["id", "text"], offset, limit)
+    assert table.to_pylist() == expected.to_pylist()
+
+
+def test_read_row_range_selects_columns(multi_file_dataset):
+    """Only the requested columns are returned."""
+    table = _read_row_range(multi_file_dataset, ["id"], 9, 3)
+    assert table.column_names == ["id"]
+    assert table.column("id").to_pylist() == [9, 10, 11]
+
+
+@pytest.fixture
+def upstream_sha(monkeypatch):
+    """Stub the upstream revision lookup; set `.sha` to simulate a push."""
+    class Upstream:
+        sha = "a" * 40
+
+    monkeypatch.setattr(metadata, "_fetch_upstream_revision", lambda repo_id, revision, token: Upstream.sha)
+    metadata._REVISION_CACHE.clear()
+    yield Upstream
+    metadata._REVISION_CACHE.clear()
+
+
+def test_viewer_revision_pins_body_to_etag_commit(upstream_sha):
+    """The body is served from the same commit SHA the ETag is built from."""
+    revision, etag = metadata.get_viewer_revision("ns", "ds", "info", ref="main")
+    assert revision == upstream_sha.sha
+    assert etag == metadata.get_viewer_revision("ns", "ds", "info", ref="main")[1]
+    assert etag != metadata.get_viewer_revision("ns", "ds", "rows", ref="main")[1]
+
+    upstream_sha.sha = "b" * 40
+    metadata._REVISION_CACHE.clear()
+    new_revision, new_etag = metadata.get_viewer_revision("ns", "ds", "info", ref="main")
+    assert (new_revision, new_etag) != (revision, etag)
+    assert new_revision == upstream_sha.sha
+
+
+def test_viewer_revision_unresolved(upstream_sha):
+    """An unresolvable ref is served as-is, without an ETag."""
+    upstream_sha.sha = None
+    assert metadata.get_viewer_revision("ns", "ds", "info", ref="dev") == ("dev", None)
+
+
+def test_dataset_info_loaded_at_resolved_sha(upstream_sha, monkeypatch, tmp_path):
+    """Info cached under a commit SHA is loaded from that commit, not the live ref."""
+    fake_datasets = MagicMock()
+    fake_datasets.config.HF_DATASETS_CACHE = str(tmp_path)
+    monkeypatch.setattr(metadata, "lazy_datasets", lambda: fake_datasets)
+    monkeypatch.setattr(metadata, "_INFO_CACHE_ROOT", None)
+
+    metadata._load_dataset_info("ns/ds", "default")
+    assert fake_datasets.load_dataset_builder.call_args.kwargs["revision"] == upstream_sha.sha
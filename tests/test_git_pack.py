@@ -0,0 +1,87 @@
+import subprocess
+
+import pytest
+
+from kohakuhub.api.git.utils.pack import GitPackParser
+
+OBJECT_TYPES = {"commit": 1, "tree": 2, "blob": 3, "tag": 4}
+
+
+def _git(repo, *args, input=None) -> bytes:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], input=input, capture_output=True, check=True
+    ).stdout
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    """A repository whose history deltifies well: a large file edited a few times."""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    _git(repo, "config", "user.name", "Test")
+    _git(repo, "config", "user.email", "test@example.com")
+
+    # Large enough to be hashed on the pool, not inline
+    lines = [f"line {i}: {'x' * (i % 50)}\n" for i in range(5000)]
+    for revision in range(4):
+        lines[revision * 1000] = f"edited in revision {revision}\n"
+        (repo / "big.txt").write_text("".join(lines))
+        (repo / "small.txt").write_text(f"revision {revision}\n")
+        _git(repo, "add", ".")
+        _git(repo, "commit", "-q", "-m", f"revision {revision}")
+    _git(repo, "tag", "-a", "v1", "-m", "annotated tag")
+    return repo
+
+
+def _expected_objects(repo) -> dict:
+    """Every object reachable from the tag, read back with git cat-file."""
+    shas = [line.split()[0] for line in _git(repo, "rev-list", "--objects", "v1").decode().splitlines()]
+    shas.append(_git(repo, "rev-parse", "v1").decode().strip())
+    expected = {}
+    for sha in shas:
+        kind = _git(repo, "cat-file", "-t", sha).decode().strip()
+        expected[sha] = (OBJECT_TYPES[kind], _git(repo, "cat-file", kind, sha))
+    return expected
+
+
+def _pack(repo, *options) -> bytes:
+    return _git(repo, "pack-objects", "--revs", "--stdout", *options, input=b"refs/tags/v1\n")
+
+
+def _delta_count(repo, pack: bytes, tmp_path) -> int:
+    """Number of deltified objects in a pack, as reported by git verify-pack."""
+    path = tmp_path / "check.pack"
+    path.write_bytes(pack)
+    _git(repo, "index-pack", str(path))
+    output = _git(repo, "verify-pack", "-v", str(path.with_suffix(".idx"))).decode()
+    # Deltified entries carry two extra fields: depth and base SHA-1
+    return sum(1 for line in output.splitlines() if len(line.split()) == 7)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        ("--delta-base-offset",),     # OFS_DELTA
+        ("--no-delta-base-offset",),  # REF_DELTA
+    ],
+)
+def test_parse_deltified_pack(git_repo, tmp_path, options):
+    """Objects (and their SHA-1s) parsed from a real pack match git's own."""
+    pack = _pack(git_repo, *options)
+    assert _delta_count(git_repo, pack, tmp_path) > 0
+
+    objects = GitPackParser(pack, verify_checksum=True).parse()
+    assert objects == _expected_objects(git_repo)
+
+
+def test_corrupted_trailer_rejected(git_repo):
+    """A pack whose trailing SHA-1 doesn't match is rejected when verifying."""
+    pack = bytearray(_pack(git_repo))
+    pack[-1] ^= 0xFF
+
+    with pytest.raises(ValueError, match="checksum"):
+        GitPackParser(bytes(pack), verify_checksum=True).parse()
+
+    # Without verification the trailer isn't looked at
+    assert GitPackParser(bytes(pack)).parse() == _expected_objects(git_repo)
@@ -36,7 +36,7 @@ async def test_run_inference_endpoint(mock_pipeline):
     mock_req = MagicMock(spec=Request)
     mock_req.client.host = "127.0.0.1"
     
-    with patch("kohakuhub.api.inference.get_repository") as mock_repo_get:
+    with patch("kohakuhub.api.inference.get_repository_cached") as mock_repo_get:
         mock_repo = MagicMock(spec=Repository)
         mock_repo_get.return_value = mock_repo
         
@@ -51,3 +51,46 @@ def test_create_inference_gradio():
     demo = inference.create_inference_gradio("test/model")
     assert demo is not None
     assert len(demo.blocks) > 0
+
+
+class _FillMaskPipe:
+    """Mimics transformers' FillMaskPipeline output shapes."""
+
+    task = "fill-mask"
+
+    def __init__(self, top_k=3):
+        self.top_k = top_k
+        self.calls = []
+
+    def _predict(self, text):
+        return [{"sequence": f"{text} {i}", "score": 1.0 / (i + 1)} for i in range(self.top_k)]
+
+    def __call__(self, inputs, **kwargs):
+        self.calls.append(inputs)
+        if isinstance(inputs, str):
+            return self._predict(inputs)
+        outputs = [self._predict(text) for text in inputs]
+        # A one-element list is squeezed to the bare predictions
+        return outputs[0] if len(outputs) == 1 else outputs
+
+
+@pytest.mark.asyncio
+async def test_single_fill_mask_request_keeps_top_k():
+    """A fill-mask request that arrives alone gets the full top-k list."""
+    pipe = _FillMaskPipe()
+    result = await inference._infer_batched(pipe, "test/fill-mask:main", "Paris is the [MASK].", {})
+    assert result == pipe._predict("Paris is the [MASK].")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fill_mask_requests_are_batched():
+    """Concurrent fill-mask requests share a forward pass, each keeping its top-k."""
+    import asyncio
+
+    pipe = _FillMaskPipe()
+    texts = ["a [MASK]", "b [MASK]", "c [MASK]"]
+    results = await asyncio.gather(
+        *(inference._infer_batched(pipe, "test/fill-mask:main", text, {}) for text in texts)
+    )
+    assert results == [pipe._predict(text) for text in texts]
+    assert pipe.calls == [texts]
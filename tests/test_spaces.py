@@ -1,28 +1,42 @@
+import asyncio
 import pytest
 import os
+import signal
 import time
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from kohakuhub.api import spaces
 
 @pytest.fixture
 def mock_subprocess():
-    with patch("subprocess.Popen") as mock:
+    with patch("asyncio.create_subprocess_exec", new_callable=AsyncMock) as mock:
         proc = MagicMock()
         proc.pid = 1234
-        proc.poll.return_value = None
+        proc.returncode = None
+        # The process keeps running until it is signalled
+        proc.exited = asyncio.Event()
+
+        async def wait():
+            await proc.exited.wait()
+            return 0
+
+        proc.wait = wait
         mock.return_value = proc
         yield mock
 
 @pytest.fixture
 def mock_os():
-    with patch("os.makedirs") as mock_mkdir:
-        with patch("os.killpg") as mock_kill:
-            with patch("os.getpgid") as mock_pgid:
-                mock_pgid.return_value = 5678
-                yield mock_mkdir, mock_kill
+    with patch("os.killpg") as mock_kill:
+        with patch("os.getpgid") as mock_pgid:
+            mock_pgid.return_value = 5678
+            yield mock_kill
+
+@pytest.fixture
+def spaces_root(tmp_path):
+    with patch.object(spaces, "_SPACES_ROOT", str(tmp_path)):
+        yield tmp_path
 
 @pytest.mark.asyncio
-async def test_deploy_space_lifecycle(mock_subprocess, mock_os):
+async def test_deploy_space_lifecycle(mock_subprocess, mock_os, spaces_root):
     """Test the full lifecycle of a space deployment."""
     from kohakuhub.db import Repository
     from fastapi import BackgroundTasks
@@ -49,18 +63,69 @@ async def test_deploy_space_lifecycle(mock_subprocess, mock_os):
             await spaces.deploy_gradio_app(repo_id, "main", namespace, repo_name)
             assert spaces._RUNNING_SPACES[repo_id]["status"] == "running"
             assert spaces._RUNNING_SPACES[repo_id]["port"] is not None
+            assert (spaces_root / "test_space-repo" / "app.py").exists()
             
             # 3. Check status
             status_resp = await spaces.get_space_status(namespace, repo_name)
             assert status_resp["status"] == "running"
             assert "http://localhost:" in status_resp["url"]
             
-            # 4. Stop space
+            # 4. Stop space; the process exits on SIGTERM
+            mock_kill = mock_os
+            mock_kill.side_effect = lambda pgid, sig: mock_subprocess.return_value.exited.set()
             stop_resp = await spaces.stop_space(namespace, repo_name)
             assert stop_resp["message"] == "Space stopped"
             assert repo_id not in spaces._RUNNING_SPACES
+            mock_kill.assert_called_once_with(5678, signal.SIGTERM)
 
 def test_find_free_port():
     port = spaces.find_free_port()
     assert isinstance(port, int)
     assert 1024 <= port <= 65535
+
+@pytest.mark.asyncio
+async def test_space_exit_marks_crashed():
+    """A space process that exits is flagged by its exit watcher, without polling."""
+    import sys
+
+    proc = await asyncio.create_subprocess_exec(sys.executable, "-c", "pass")
+    repo_id = "test/crashing-space"
+    spaces._RUNNING_SPACES = {
+        repo_id: {"process": proc, "port": 1, "status": "running"}
+    }
+
+    await asyncio.wait_for(spaces._watch_space_exit(repo_id, proc), timeout=10)
+
+    status_resp = await spaces.get_space_status("test", "crashing-space")
+    assert status_resp["status"] == "crashed"
+    assert proc.returncode == 0
+
+
+@pytest.mark.asyncio
+async def test_stop_space_kills_after_grace(mock_os):
+    """A space that ignores SIGTERM is killed and reaped before the entry goes."""
+    import sys
+
+    script = (
+        "import signal, time\n"
+        "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+        "print(flush=True)\n"
+        "time.sleep(60)\n"
+    )
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", script, stdout=asyncio.subprocess.PIPE
+    )
+    await proc.stdout.readline()  # SIGTERM handler installed
+    repo_id = "test/stubborn-space"
+    spaces._RUNNING_SPACES = {
+        repo_id: {"process": proc, "port": 1, "status": "running"}
+    }
+
+    mock_kill = mock_os
+    mock_kill.side_effect = lambda pgid, sig: os.kill(proc.pid, sig)
+    with patch.object(spaces, "_STOP_GRACE_SECONDS", 0.2):
+        await spaces.stop_space("test", "stubborn-space")
+
+    assert [c.args[1] for c in mock_kill.call_args_list] == [signal.SIGTERM, signal.SIGKILL]
+    assert proc.returncode == -signal.SIGKILL
+    assert repo_id not in spaces._RUNNING_SPACES
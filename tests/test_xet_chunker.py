@@ -0,0 +1,103 @@
+import hashlib
+import io
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from kohakuhub.api.xet import chunker
+
+MB = 1024 * 1024
+
+
+def _random_bytes(size: int, seed: int = 0) -> bytes:
+    return np.random.default_rng(seed).bytes(size)
+
+
+class _TrickleBody(io.BytesIO):
+    """A response body that hands out at most `step` bytes per read."""
+
+    def __init__(self, data: bytes, step: int):
+        super().__init__(data)
+        self.step = step
+
+    def read(self, size: int = -1) -> bytes:
+        return super().read(min(size, self.step) if size >= 0 else self.step)
+
+
+def _chunks(body) -> list:
+    reader = chunker._ChunkReader(body)
+    chunks = []
+    while (chunk := reader.next_chunk()) is not None:
+        chunks.append(chunk)
+    return chunks
+
+
+@pytest.fixture(scope="module")
+def data():
+    return _random_bytes(40 * MB)
+
+
+def test_cuts_within_bounds(data):
+    """Every chunk but the last is between the minimum and maximum size."""
+    chunks = _chunks(io.BytesIO(data))
+    sizes = [len(chunk_data) for _, chunk_data in chunks]
+
+    assert len(chunks) > 3
+    assert all(chunker._CDC_MIN_SIZE <= size <= chunker._CDC_MAX_SIZE for size in sizes[:-1])
+    assert b"".join(chunk_data for _, chunk_data in chunks) == data
+    assert all(chash == hashlib.sha256(chunk_data).hexdigest() for chash, chunk_data in chunks)
+
+
+def test_cut_at_max_size_without_boundary():
+    """With no content boundary, chunks are cut at the maximum size."""
+    data = bytes(40 * MB)
+    with patch.object(chunker, "_CDC_THRESHOLD", 0):
+        sizes = [len(chunk_data) for _, chunk_data in _chunks(io.BytesIO(data))]
+    assert sizes == [chunker._CDC_MAX_SIZE, chunker._CDC_MAX_SIZE, 8 * MB]
+
+
+def test_short_tail_kept(data):
+    """A final chunk shorter than the minimum isn't dropped or merged away."""
+    tail = _random_bytes(1000, seed=1)
+    chunks = _chunks(io.BytesIO(data[: 6 * MB] + tail))
+    assert b"".join(chunk_data for _, chunk_data in chunks) == data[: 6 * MB] + tail
+
+    assert _chunks(io.BytesIO(tail)) == [(hashlib.sha256(tail).hexdigest(), tail)]
+
+
+def test_cuts_are_content_defined(data):
+    """Inserting bytes near the front leaves later chunks unchanged."""
+    original = [chash for chash, _ in _chunks(io.BytesIO(data))]
+    edited = [chash for chash, _ in _chunks(io.BytesIO(data[:100] + b"inserted" * 500 + data[100:]))]
+
+    assert original[0] != edited[0]
+    assert edited[-(len(original) - 1):] == original[1:]
+
+
+def test_cuts_independent_of_read_sizes(data):
+    """The same bytes cut the same way however the network delivers them."""
+    expected = [chash for chash, _ in _chunks(io.BytesIO(data[: 20 * MB]))]
+    trickled = [chash for chash, _ in _chunks(_TrickleBody(data[: 20 * MB], step=64 * 1024 + 7))]
+    assert trickled == expected
+
+
+@pytest.mark.asyncio
+async def test_repeated_blocks_uploaded_once():
+    """A block that repeats within one file is uploaded once but laid out each time."""
+    block = bytes(chunker._CDC_MAX_SIZE)
+    tail = b"tail"
+    s3 = MagicMock()
+    s3.get_object.return_value = {"Body": io.BytesIO(block * 3 + tail)}
+
+    with patch.object(chunker, "_CDC_THRESHOLD", 0), patch.object(
+        chunker, "check_block_exists_bloom", AsyncMock(return_value=False)
+    ):
+        chunks = await chunker._stream_blocks(s3, "lfs/ab/cd/abcd")
+
+    block_hash = hashlib.sha256(block).hexdigest()
+    tail_hash = hashlib.sha256(tail).hexdigest()
+    assert chunks == [(block_hash, len(block))] * 3 + [(tail_hash, len(tail))]
+
+    uploaded = sorted(call.kwargs["Key"] for call in s3.put_object.call_args_list)
+    assert uploaded == sorted(chunker.get_xet_block_s3_key(h) for h in (block_hash, tail_hash))
@@ -0,0 +1,111 @@
+import io
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from kohakuhub.api.xet import compactor
+from kohakuhub.utils.xet import get_xet_block_s3_key
+
+MB = 1024 * 1024
+
+
+class _StubS3:
+    """In-memory S3 with just enough multipart upload support for compaction."""
+
+    def __init__(self, objects: dict, fail_part: int = None):
+        self.objects = dict(objects)
+        self.fail_part = fail_part
+        self.parts = {}
+        self.aborted = []
+        self.completed = []
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        return {"UploadId": "upload-1"}
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def upload_part_copy(self, Bucket, Key, UploadId, PartNumber, CopySource):
+        self.parts[PartNumber] = self.objects[CopySource["Key"]]
+        return {"CopyPartResult": {"ETag": f'"copy-{PartNumber}"'}}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber == self.fail_part:
+            raise RuntimeError("part upload failed")
+        self.parts[PartNumber] = Body
+        return {"ETag": f'"part-{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        assert numbers == sorted(numbers)
+        self.completed.append([len(self.parts[n]) for n in numbers])
+        self.objects[Key] = b"".join(self.parts[n] for n in numbers)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(Key)
+
+
+def _blocks(*sizes):
+    rng = np.random.default_rng(0)
+    blocks, objects = [], {}
+    for index, size in enumerate(sizes):
+        block = SimpleNamespace(hash=f"{index:064x}", size=size)
+        blocks.append(block)
+        objects[get_xet_block_s3_key(block.hash)] = rng.bytes(size)
+    return blocks, objects
+
+
+@pytest.fixture
+def xorb_db():
+    """Stub the XORB tables, recording what compaction writes."""
+    with patch.object(compactor, "db"), patch.object(compactor, "XetXorb") as xorb, patch.object(
+        compactor, "XetBlockPlacement"
+    ) as placement:
+        yield SimpleNamespace(xorb=xorb, placement=placement)
+
+
+@pytest.mark.asyncio
+async def test_xorb_layout_matches_placements(xorb_db):
+    """Large blocks are copied, small ones packed, and placements match the bytes."""
+    blocks, objects = _blocks(6 * MB, 1 * MB, 3 * MB, 7 * MB, 3 * MB, MB // 2, 2 * MB, 5 * MB)
+    s3 = _StubS3(objects)
+
+    with patch.object(compactor, "get_s3_client", return_value=s3):
+        await compactor._create_xorb_from_batch(blocks)
+
+    assert not s3.aborted
+    assert len(s3.completed) == 1
+    part_sizes = s3.completed[0]
+    assert all(size >= compactor._MIN_PART_SIZE for size in part_sizes[:-1])
+    # 6MB, 7MB and 5MB blocks are copied as-is; the rest are packed
+    assert part_sizes[:3] == [6 * MB, 7 * MB, 5 * MB]
+
+    storage_key = xorb_db.xorb.create.call_args.kwargs["storage_key"]
+    xorb = s3.objects[storage_key]
+    assert xorb_db.xorb.create.call_args.kwargs["size"] == len(xorb) == sum(b.size for b in blocks)
+
+    placements = [call.kwargs for call in xorb_db.placement.create.call_args_list]
+    assert sorted(p["block"].hash for p in placements) == sorted(b.hash for b in blocks)
+    for p in placements:
+        data = objects[get_xet_block_s3_key(p["block"].hash)]
+        assert p["length"] == len(data)
+        assert xorb[p["offset"] : p["offset"] + p["length"]] == data
+
+
+@pytest.mark.asyncio
+async def test_failed_part_aborts_upload(xorb_db):
+    """A part that fails to upload aborts the multipart upload and records nothing."""
+    blocks, objects = _blocks(6 * MB, 3 * MB, 3 * MB, 1 * MB)
+    # Part 1 is the copied block; part 2 is the first packed part
+    s3 = _StubS3(objects, fail_part=2)
+
+    with patch.object(compactor, "get_s3_client", return_value=s3):
+        with pytest.raises(RuntimeError, match="part upload failed"):
+            await compactor._create_xorb_from_batch(blocks)
+
+    assert len(s3.aborted) == 1
+    assert not s3.completed
+    xorb_db.xorb.create.assert_not_called()
+    xorb_db.placement.create.assert_not_called()